@@ -3,6 +3,7 @@
 Usage: python scripts/run_demo.py AAPL
 """
 import sys
+import orjson
 from src.backend import generate_company_report
 
 
@@ -13,8 +14,9 @@ def main():
     ticker = sys.argv[1]
     report = generate_company_report(ticker)
     try:
-        import json
-        print(json.dumps(report, indent=2, default=str))
+        # Report is already normalized to plain types; orjson only supports 2-space indent
+        sys.stdout.buffer.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE))
+        sys.stdout.buffer.flush()
     except Exception:
         print(report)
 
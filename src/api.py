@@ -1,56 +1,302 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import Dict
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.middleware.gzip import GZipMiddleware
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, Optional, Tuple
+import asyncio
+import hashlib
 import logging
-import json
-from datetime import datetime, date
+import threading
+import time
+import msgspec
+import orjson
 
-from src.backend import generate_company_report
+from src.backend import ANALYSIS_FAILED_SUMMARY, close_http_session, generate_company_report_async
 from src import config
 
 logger = logging.getLogger("llm_stock_insights.api")
 
-# Custom JSON encoder to handle datetime/Timestamp objects
-class CustomJSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, (datetime, date)):
-            return obj.isoformat()
-        if hasattr(obj, 'isoformat'):  # pandas Timestamp
-            return obj.isoformat()
-        if hasattr(obj, 'item'):  # numpy types
-            return obj.item()
-        return super().default(obj)
-
-app = FastAPI(title="LLM Stock Insights API")
-
 # CORS - allow frontend origin or localhost for dev
 origins = [config.API_URL, "http://localhost:3000", "http://localhost:5173", "http://127.0.0.1:5173"]
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[o for o in origins if o],
-    allow_credentials=True,
-    allow_methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["*"],
-)
+_ORIGIN_BYTES = frozenset(o.encode("ascii") for o in origins if o)
+
+# Brotli compression is optional; fall back to plain gzip when brotli-asgi isn't installed
+try:
+    from brotli_asgi import BrotliMiddleware
+    _brotli = True
+except Exception:
+    _brotli = False
+
+
+# Timestamps/numpy values are normalized by the pipeline; raw yfinance dicts may still
+# carry non-string keys
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _dumps(content: Any) -> bytes:
+    """Encode content straight to JSON bytes in a single pass.
+
+    generate_company_report already normalizes its output to plain Python types, so no
+    ``default=`` callback is needed.
+    """
+    return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+
+def _encode_sections(report: dict) -> Tuple[bytes, ...]:
+    """Encode each top-level report key separately so the body can be sent section by section.
+
+    Joining the chunks yields the same JSON object as ``_dumps(report)``.
+    """
+    chunks = []
+    for i, (key, value) in enumerate(report.items()):
+        chunks.append((b"," if i else b"{") + orjson.dumps(key) + b":" + _dumps(value))
+    chunks.append(b"}" if chunks else b"{}")
+    return tuple(chunks)
+
+
+def _etag(chunks: Iterable[bytes]) -> str:
+    # Weak validator: it identifies the JSON content, and the compression middleware may
+    # still vary the encoded bytes on the wire
+    h = hashlib.blake2b(digest_size=16)
+    for chunk in chunks:
+        h.update(chunk)
+    return f'W/"{h.hexdigest()}"'
+
+
+def _stream_json(chunks: Iterable[bytes], headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    return StreamingResponse(body(), media_type="application/json", headers=headers)
+
+
+class ReportJSONResponse(Response):
+    """JSON response encoded with orjson, using the same options as the streamed report body."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return _dumps(content)
+
+
+# A serialized report: (json_chunks, etag); etag is None for reports that must not be cached
+CachedReport = Tuple[Tuple[bytes, ...], Optional[str]]
+
+# Serialized reports keyed by upper-cased ticker: {ticker: (created_at, json_chunks, etag)}.
+# Dicts keep insertion order, so the first key is always the oldest entry.
+_REPORT_CACHE: Dict[str, Tuple[float, Tuple[bytes, ...], str]] = {}
+_REPORT_CACHE_LOCK = threading.Lock()
+_TTL = 300.0
+_REPORT_CACHE_MAX = 128
+_CACHE_CONTROL = f"private, max-age={int(_TTL)}"
+_NO_STORE = {"cache-control": "no-store"}
+
+
+# Dedicated pool for the pipeline's blocking steps (yfinance, LLM calls, report encoding) so they
+# don't starve FastAPI's shared threadpool; installed as the loop's default executor on startup so
+# the backend's asyncio.to_thread calls land here. The semaphore caps how many reports hit the
+# LLM provider at once.
+_EXECUTOR = ThreadPoolExecutor(max_workers=config.REPORT_WORKERS, thread_name_prefix="report")
+_REPORT_SEMAPHORE = asyncio.Semaphore(config.REPORT_CONCURRENCY)
+
+# Single-flight table: concurrent cache misses for the same ticker share one pipeline run.
+# Only touched from the event loop with no await between lookup and insert, so no lock needed.
+_INFLIGHT: Dict[str, "asyncio.Task[CachedReport]"] = {}
+
+
+def _cache_get(key: str):
+    hit = _REPORT_CACHE.get(key)
+    if hit and time.monotonic() - hit[0] < _TTL:
+        return hit[1], hit[2]
+    return None
+
+
+def _cache_put(key: str, payload: CachedReport) -> None:
+    with _REPORT_CACHE_LOCK:
+        _REPORT_CACHE.pop(key, None)
+        _REPORT_CACHE[key] = (time.monotonic(), payload[0], payload[1])
+        while len(_REPORT_CACHE) > _REPORT_CACHE_MAX:
+            _REPORT_CACHE.pop(next(iter(_REPORT_CACHE)))
+
+
+class FastCORS:
+    """Minimal pure-ASGI CORS middleware for a small, static set of origins.
+
+    ``allowed`` is a frozenset of origin bytes so the raw header value can be looked up
+    without decoding. Preflight requests are answered directly; for everything else the
+    CORS headers are appended to ``http.response.start`` without building Request/Response
+    objects.
+    """
 
+    def __init__(self, app, allowed):
+        self.app = app
+        self.allowed = allowed
+        self.methods = b"GET, POST, OPTIONS"
 
-@app.get("/health")
-def health() -> Dict[str, str]:
-    return {"status": "ok"}
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
+        origin = None
+        preflight = False
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                preflight = True
+            elif name == b"access-control-request-headers":
+                request_headers = value
 
-@app.post("/report")
-def post_report(payload: Dict[str, str]):
+        if origin is None or origin not in self.allowed:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = [
+            (b"access-control-allow-origin", origin),
+            (b"access-control-allow-credentials", b"true"),
+            (b"vary", b"Origin"),
+        ]
+
+        if scope["method"] == "OPTIONS" and preflight:
+            headers = cors_headers + [
+                (b"access-control-allow-methods", self.methods),
+                (b"access-control-max-age", b"600"),
+            ]
+            if request_headers:
+                headers.append((b"access-control-allow-headers", request_headers))
+            await send({"type": "http.response.start", "status": 204, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + cors_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+
+_HEALTH_BODY = b'{"status":"ok"}'
+_HEALTH_HEADERS = [(b"content-type", b"application/json"), (b"content-length", str(len(_HEALTH_BODY)).encode())]
+
+
+class HealthCheck:
+    """Answer ``/health`` with a preformatted body before routing, CORS or compression run."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] == "/health":
+            await send({"type": "http.response.start", "status": 200, "headers": _HEALTH_HEADERS})
+            await send({"type": "http.response.body", "body": _HEALTH_BODY})
+            return
+        await self.app(scope, receive, send)
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    asyncio.get_running_loop().set_default_executor(_EXECUTOR)
+    yield
+    await close_http_session()
+
+
+app = FastAPI(title="LLM Stock Insights API", default_response_class=ReportJSONResponse, lifespan=_lifespan)
+
+app.add_middleware(FastCORS, allowed=_ORIGIN_BYTES)
+
+# Compression is added after CORS so it wraps it (Starlette middleware is LIFO). minimum_size
+# keeps tiny bodies such as /health uncompressed.
+if _brotli:
+    app.add_middleware(BrotliMiddleware, quality=4, minimum_size=1024, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Added last so it is the outermost user middleware: load balancer probes never reach the router
+app.add_middleware(HealthCheck)
+
+
+class ReportRequest(msgspec.Struct):
+    """Body of POST /report, decoded and validated straight from the raw JSON bytes."""
+
+    ticker: str
+
+
+def _cacheable(report: dict) -> bool:
+    """True for complete reports; validation failures and reports with a failed LLM step are
+    served once but never cached, so the next request retries the pipeline."""
+    if "error" in report:
+        return False
+    if (report.get("comparator") or {}).get("error"):
+        return False
+    return not any(a.get("summary") == ANALYSIS_FAILED_SUMMARY for a in report.get("social_analyses") or ())
+
+
+def _encode_report(report: dict) -> CachedReport:
+    """Serialize a report into (json_chunks, etag), with no etag if it isn't _cacheable. Runs in _EXECUTOR."""
+    chunks = _encode_sections(report)
+    return chunks, _etag(chunks) if _cacheable(report) else None
+
+
+def _report_response(request: Request, payload: CachedReport) -> Response:
+    """Return 304 when the client already holds this version of the report, else stream it.
+
+    Reports that aren't cacheable go out with no-store so browsers don't keep them either.
+    """
+    chunks, etag = payload
+    if etag is None:
+        return _stream_json(chunks, headers=_NO_STORE)
+    headers = {"etag": etag, "cache-control": _CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in (t.strip() for t in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return _stream_json(chunks, headers=headers)
+
+
+async def _generate_payload(key: str, ticker: str) -> CachedReport:
+    try:
+        async with _REPORT_SEMAPHORE:
+            report = await generate_company_report_async(ticker)
+        payload = await asyncio.get_running_loop().run_in_executor(_EXECUTOR, _encode_report, report)
+        # Don't pin validation failures or failed LLM steps for the whole TTL window
+        if payload[1] is not None:
+            _cache_put(key, payload)
+        return payload
+    finally:
+        _INFLIGHT.pop(key, None)
+
+
+# No response_model here: returning the Response directly skips jsonable_encoder
+@app.post("/report", response_class=ReportJSONResponse)
+async def post_report(request: Request):
     """Accept JSON payload {"ticker": "AAPL"} and return the structured report."""
-    logger.info("Api is being called")
-    ticker = payload.get("ticker")
-    if not ticker:
-        raise HTTPException(status_code=400, detail="ticker is required in JSON body")
+    logger.debug("Api is being called")
+    try:
+        req = msgspec.json.decode(await request.body(), type=ReportRequest)
+    except msgspec.DecodeError as e:  # also covers msgspec.ValidationError
+        return ReportJSONResponse({"detail": str(e)}, status_code=400)
+    if not req.ticker:
+        return ReportJSONResponse({"detail": "ticker is required in JSON body"}, status_code=400)
+    ticker = key = req.ticker.upper()
+    cached = _cache_get(key)
+    if cached is not None:
+        return _report_response(request, cached)
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_generate_payload(key, ticker))
+        _INFLIGHT[key] = task
     try:
-        report = generate_company_report(ticker)
-        json_str = json.dumps(report, cls=CustomJSONEncoder)
-        return JSONResponse(content=json.loads(json_str))
+        # shield: one client disconnecting must not cancel the run other callers are awaiting
+        payload = await asyncio.shield(task)
+        return _report_response(request, payload)
     except Exception as e:
-        logger.exception("Failed to generate report for %s", ticker)
-        raise HTTPException(status_code=500, detail=str(e))
+        # Full tracebacks only when debugging; otherwise a compact one-line record
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("report failed ticker=%s", ticker, exc_info=True)
+        else:
+            logger.error("report failed ticker=%s err=%r", ticker, e)
+        return ReportJSONResponse({"detail": str(e)}, status_code=500)
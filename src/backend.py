@@ -4,18 +4,29 @@ Anthropic/OpenAI wrappers, analysis and orchestration.
 This file intentionally groups the main functions used by the service so endpoints can import
 from a single place.
 """
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import functools
 import json
-import requests
+import re
+import orjson
+import time
+import httpx
+import ahocorasick
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 import yfinance as yf
 from bs4 import BeautifulSoup
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import math
-import statistics
+import numpy as np
+import pandas as pd
 
 # Local config and prompts
 from src import config
 from src import prompts
+from src import http
+from src import prompt_cache
+from src.cache import TTLCache, cached
 
 
 # Simple logger
@@ -28,12 +39,109 @@ logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
 
+_JSON_SCALARS = (str, int, float, bool, type(None))
+
+
+def _normalize(obj):
+    """Recursively convert pipeline output into plain Python types any JSON encoder accepts.
+
+    Timestamps/datetimes become ISO strings and numpy scalars/arrays become Python
+    numbers/lists, so serializers never need a ``default=`` callback.
+    """
+    if type(obj) in _JSON_SCALARS:
+        return obj
+    if isinstance(obj, dict):
+        return {k: _normalize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(v) for v in obj]
+    if hasattr(obj, "isoformat"):  # datetime/date/pandas Timestamp
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):  # numpy scalars and arrays
+        return obj.tolist()
+    return obj
+
+
+async def close_http_session() -> None:
+    """Close the shared HTTP client bound to the running event loop, if any."""
+    await http.aclose_client()
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Timeouts, connection errors, 429s and 5xxs are worth another try; other errors are not."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(initial=1, max=10),
+    retry=retry_if_exception(_is_retryable),
+    reraise=True,
+)
+async def _get_with_retry(client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+    """GET with exponential backoff + jitter on transient failures.
+
+    429/5xx responses are raised (and retried); any other response is returned for the caller
+    to inspect, e.g. YouTube's 403 for disabled comments.
+    """
+    r = await client.get(url, **kwargs)
+    if r.status_code == 429 or r.status_code >= 500:
+        r.raise_for_status()
+    return r
+
+
+# Circuit breaker per external source: after _CIRCUIT_THRESHOLD consecutive failures within
+# _CIRCUIT_WINDOW seconds the source is skipped for _CIRCUIT_COOLDOWN seconds instead of burning
+# retries (and quota) on every report. Only outages count as failures (exhausted transient
+# errors, a quota 403 on search); a deleted video or odd payload doesn't, and any success resets.
+_circuit = {"youtube": {"fails": [], "open_until": 0.0}}
+_CIRCUIT_THRESHOLD = 3
+_CIRCUIT_WINDOW = 60.0
+_CIRCUIT_COOLDOWN = 300.0
+
+
+def _circuit_open(source: str) -> bool:
+    return _circuit[source]["open_until"] > time.monotonic()
+
+
+def _circuit_record(source: str, ok: bool) -> None:
+    state = _circuit[source]
+    if ok:
+        state["fails"].clear()
+        return
+    now = time.monotonic()
+    fails = [t for t in state["fails"] if now - t < _CIRCUIT_WINDOW]
+    fails.append(now)
+    if len(fails) >= _CIRCUIT_THRESHOLD:
+        fails.clear()
+        state["open_until"] = now + _CIRCUIT_COOLDOWN
+        logger.warning("%s failing repeatedly; skipping it for %ds", source, _CIRCUIT_COOLDOWN)
+    state["fails"] = fails
+
+
 def safe_truncate(text, max_len=2000):
     if not text:
         return text
     return text if len(text) <= max_len else text[:max_len] + "..."
 
 
+# yf.Ticker objects keyed by symbol, so validation and the Yahoo fetch share one instance (and
+# yfinance's session/cookie state). A Ticker memoizes .info after the first fetch, so entries
+# expire with the Yahoo fetch TTL instead of living for the whole process.
+_tickers = TTLCache(maxsize=512)
+_TICKER_TTL = 300
+
+
+def _ticker(symbol: str) -> "yf.Ticker":
+    t = _tickers.get(symbol)
+    if t is None:
+        t = yf.Ticker(symbol)
+        _tickers.set(symbol, t, _TICKER_TTL)
+    return t
+
+
 def validate_ticker(ticker: str) -> Tuple[bool, dict]:
     """Validate a ticker symbol and return structured metadata.
 
@@ -42,7 +150,7 @@ def validate_ticker(ticker: str) -> Tuple[bool, dict]:
       - name: company name if found
       - info: raw yfinance info dict (may be empty)
     """
-    t = yf.Ticker(ticker)
+    t = _ticker(ticker)
     try:
         info = t.info
     except Exception as e:
@@ -67,11 +175,13 @@ def validate_ticker(ticker: str) -> Tuple[bool, dict]:
 def fetch_yahoo_company(ticker: str) -> dict:
     """Fetch basic company data from Yahoo via yfinance.
     
-    Returns dict with keys: summary, info, history (last 90 days)
+    Returns dict with keys: summary, info, history_df (last 90 days as a DataFrame).
+    The frame is kept as-is for metric computation and only converted to JSON records
+    once, when the final report is assembled (see _history_records).
     """
     logger.info("Fetching Yahoo Finance data for ticker: %s", ticker)
-    t = yf.Ticker(ticker)
-    result = {"info": {}, "summary": "", "history": None}
+    t = _ticker(ticker)
+    result = {"info": {}, "summary": "", "history_df": None}
     try:
         info = t.info or {}
         result["info"] = info
@@ -80,13 +190,8 @@ def fetch_yahoo_company(ticker: str) -> dict:
         
         hist = t.history(period="90d")
         if hist is not None and not hist.empty:
-            # Convert Timestamp objects to ISO strings for JSON serialization
-            hist_reset = hist.reset_index()
-            for col in hist_reset.columns:
-                if hist_reset[col].dtype == 'datetime64[ns]' or str(hist_reset[col].dtype).startswith('datetime'):
-                    hist_reset[col] = hist_reset[col].astype(str)
-            result["history"] = hist_reset.to_dict(orient="records")
-            logger.info("Successfully fetched %d days of price history for %s", len(result["history"]), ticker)
+            result["history_df"] = hist
+            logger.info("Successfully fetched %d days of price history for %s", len(hist), ticker)
         else:
             logger.warning("No price history available for %s", ticker)
     except Exception as e:
@@ -94,6 +199,28 @@ def fetch_yahoo_company(ticker: str) -> dict:
     return result
 
 
+@cached(ttl=3600, cache_if=lambda result: result[0])
+async def validate_ticker_async(ticker: str) -> Tuple[bool, dict]:
+    """Async, cached wrapper for validate_ticker (1h); only successful validations are cached."""
+    return await asyncio.to_thread(validate_ticker, ticker)
+
+
+@cached(ttl=300, cache_if=lambda result: bool(result.get("info")))
+async def fetch_yahoo_company_async(ticker: str) -> dict:
+    """Async, cached wrapper for fetch_yahoo_company (5 min, prices move).
+
+    yfinance is blocking so it runs in a worker thread.
+    """
+    return await asyncio.to_thread(fetch_yahoo_company, ticker)
+
+
+def _history_records(hist):
+    """Serialize a price history frame to JSON-ready records (ISO dates) in a single pass."""
+    if hist is None or hist.empty:
+        return None
+    return orjson.loads(hist.reset_index().to_json(orient="records", date_format="iso", double_precision=15))
+
+
 def extract_ticker_metadata_from_info(info: dict) -> dict:
     """Extract a compact metadata dict from yfinance info object."""
     if not info:
@@ -111,20 +238,21 @@ def extract_ticker_metadata_from_info(info: dict) -> dict:
     }
 
 
-def fetch_wikipedia_summary(query: str) -> dict:
+@cached(ttl=86400, cache_if=bool)
+async def fetch_wikipedia_summary_async(query: str) -> dict:
     """Fetch Wikipedia summary for a company using the MediaWiki API.
     
     Returns: {title, summary, url}
     """
     logger.info("Fetching Wikipedia summary for: %s", query)
     try:
-        params = {"action": "query", "format": "json", "prop": "extracts|info", "exintro": True, "titles": query, "redirects": 1, "inprop": "url"}
+        params = {"action": "query", "format": "json", "prop": "extracts|info", "exintro": 1, "titles": query, "redirects": 1, "inprop": "url"}
         headers = {
-            "User-Agent": "LLM-Stock-Insights/1.0 (Educational Project; Python/requests)"
+            "User-Agent": "LLM-Stock-Insights/1.0 (Educational Project; Python/httpx)"
         }
-        r = requests.get("https://en.wikipedia.org/w/api.php", params=params, headers=headers, timeout=10)
+        r = await _get_with_retry(http.get_client(), "https://en.wikipedia.org/w/api.php", params=params, headers=headers)
         r.raise_for_status()
-        data = r.json()
+        data = orjson.loads(r.content)
         pages = data.get("query", {}).get("pages", {})
         for pid, page in pages.items():
             if "missing" in page:
@@ -138,7 +266,16 @@ def fetch_wikipedia_summary(query: str) -> dict:
 
 
 
-def fetch_youtube_comments_for_query(query: str, max_videos: int = 5, max_comments_per_video: int = 50) -> dict:
+_ISO8601_DURATION_RE = re.compile(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$")
+
+
+@functools.lru_cache(maxsize=1)
+def _five_years_ago(today: date) -> str:
+    """RFC 3339 timestamp for midnight UTC five years before ``today``; cached for the current day."""
+    return (today - timedelta(days=365*5)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+async def fetch_youtube_comments_for_query_async(query: str, max_videos: int = 5, max_comments_per_video: int = 50) -> dict:
     """Fetch comments from top YouTube videos for a query using the YouTube Data API.
     
     Focuses on financial/investment analysis videos with relevant comments.
@@ -154,6 +291,9 @@ def fetch_youtube_comments_for_query(query: str, max_videos: int = 5, max_commen
     if not config.YOUTUBE_API_KEY:
         logger.info("YOUTUBE_API_KEY not provided; skipping YouTube fetch")
         return {"all_comments": [], "videos": []}
+    if _circuit_open("youtube"):
+        logger.info("YouTube circuit open after repeated failures; skipping YouTube fetch")
+        return {"all_comments": [], "videos": []}
     
     def _parse_iso8601_duration(dur: str) -> int:
         """Parse ISO 8601 duration (e.g. PT1H2M30S) and return seconds (int).
@@ -161,8 +301,7 @@ def fetch_youtube_comments_for_query(query: str, max_videos: int = 5, max_commen
         Returns 0 if the string can't be parsed.
         """
         try:
-            import re
-            m = re.match(r"PT(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?$", dur)
+            m = _ISO8601_DURATION_RE.match(dur)
             if not m:
                 return 0
             hours = int(m.group(1) or 0)
@@ -172,84 +311,79 @@ def fetch_youtube_comments_for_query(query: str, max_videos: int = 5, max_commen
         except Exception:
             return 0
 
-    def _fetch_video_duration_seconds(video_id: str) -> int:
-        """Return video duration in seconds using the YouTube Videos API (contentDetails).
+    async def _fetch_video_durations(client: httpx.AsyncClient, video_ids: List[str]) -> dict:
+        """Return {video_id: duration_seconds} using a single YouTube Videos API call (contentDetails).
 
-        Returns None when duration cannot be retrieved.
+        Videos whose duration cannot be retrieved are left out of the result.
         """
         try:
             url = "https://www.googleapis.com/youtube/v3/videos"
-            params = {"part": "contentDetails", "id": video_id, "key": config.YOUTUBE_API_KEY}
-            r = requests.get(url, params=params, timeout=10)
+            params = {"part": "contentDetails", "id": ",".join(video_ids), "key": config.YOUTUBE_API_KEY}
+            r = await _get_with_retry(client, url, params=params)
             if r.status_code == 403:
-                logger.warning("YouTube Videos API returned 403 when fetching details for %s", video_id)
-                return None
+                logger.warning("YouTube Videos API returned 403 when fetching details for %s", video_ids)
+                return {}
             r.raise_for_status()
-            items = r.json().get("items", [])
-            if not items:
-                return None
-            dur = items[0].get("contentDetails", {}).get("duration")
-            if not dur:
-                return None
-            secs = _parse_iso8601_duration(dur)
-            return secs
+            items = orjson.loads(r.content).get("items", [])
+            durations = {}
+            for item in items:
+                dur = item.get("contentDetails", {}).get("duration")
+                if dur:
+                    durations[item.get("id")] = _parse_iso8601_duration(dur)
+            return durations
         except Exception as e:
-            logger.debug("Failed to fetch duration for video %s: %s", video_id, e)
-            return None
+            logger.debug("Failed to fetch durations for videos %s: %s", video_ids, e)
+            return {}
+
     try:
         # Enhance query to target financial/investment content
         financial_query = f"{query} stock analysis investment earnings"
         logger.info("Searching YouTube for financial content: %s", financial_query)
         
-        # Calculate date 5 years ago in RFC 3339 format
-        from datetime import datetime, timedelta
-        five_years_ago = (datetime.utcnow() - timedelta(days=365*5)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        # Calculate date 5 years ago in RFC 3339 format (recomputed once per day)
+        five_years_ago = _five_years_ago(datetime.utcnow().date())
         
         search_url = "https://www.googleapis.com/youtube/v3/search"
-        # Request more videos than we need so we have backups if some have disabled comments
+        # Request more videos than we need so we have backups if some have disabled comments.
+        # Relevance filtering happens server-side, and "fields" trims the response to what we read.
         params = {
             "part": "snippet", 
             "q": financial_query, 
             "type": "video", 
-            "maxResults": max_videos * 3, 
+            "maxResults": max_videos * 2, 
             "order": "relevance",  # Most relevant first
             "publishedAfter": five_years_ago,  # Only videos from last 5 years
+            "relevanceLanguage": "en",
+            "safeSearch": "strict",
+            "fields": "items(id/videoId,snippet/title)",
             "key": config.YOUTUBE_API_KEY
         }
+        if config.YOUTUBE_CATEGORY_ID:
+            params["videoCategoryId"] = config.YOUTUBE_CATEGORY_ID
         logger.info("Filtering videos published after: %s", five_years_ago)
-        r = requests.get(search_url, params=params, timeout=10)
-        
+        client = http.get_client()
+        r = await _get_with_retry(client, search_url, params=params)
         # Check for 403 errors specifically
         if r.status_code == 403:
             logger.warning("YouTube API returned 403 Forbidden - API key may be invalid or quota exceeded. Skipping YouTube data.")
+            _circuit_record("youtube", False)
             return {"all_comments": [], "videos": []}
-            
+
         r.raise_for_status()
-        videos = r.json().get("items", [])
+        _circuit_record("youtube", True)
+        videos = orjson.loads(r.content).get("items", [])
         all_comments = []
         video_summaries = []
         videos_with_comments = 0
-        
-        for v in videos:
-            # Stop if we've already gotten enough videos with comments
-            if videos_with_comments >= max_videos:
-                break
-                
-            vid = v["id"]["videoId"]
-            video_title = v["snippet"].get("title", "Unknown")
-            
-            # Filter videos - prefer financial/investment content in title
-            title_lower = video_title.lower()
-            financial_keywords = ['stock', 'invest', 'earnings', 'analysis', 'buy', 'sell', 'financial', 'dividend', 'valuation', 'portfolio', 'market']
-            
-            is_financial = any(keyword in title_lower for keyword in financial_keywords)
-            if not is_financial:
-                logger.info("Skipping non-financial video: %s", video_title)
-                continue
 
-            # Skip Shorts and prefer longer-form educational videos (~10 minutes)
-            # Fetch video duration (seconds) and skip if it's a short or under 10 minutes
-            duration_secs = _fetch_video_duration_seconds(vid)
+        candidates = [(v["id"]["videoId"], v["snippet"].get("title", "Unknown")) for v in videos]
+
+        # Skip Shorts and prefer longer-form educational videos (~10 minutes)
+        # Durations for all candidates come from one batched Videos API call
+        durations = await _fetch_video_durations(client, [vid for vid, _ in candidates]) if candidates else {}
+        eligible = []
+        for vid, video_title in candidates:
+            duration_secs = durations.get(vid)
             if duration_secs is None:
                 logger.info("Could not determine duration for video %s (ID: %s) — skipping", video_title, vid)
                 continue
@@ -261,21 +395,38 @@ def fetch_youtube_comments_for_query(query: str, max_videos: int = 5, max_commen
             if duration_secs < 600:
                 logger.info("Skipping short video (<10min, %ds): %s", duration_secs, video_title)
                 continue
-            
-            logger.info("Trying to fetch comments from financial video: %s (ID: %s)", video_title, vid)
-            
-            comment_list = fetch_comments_for_video(vid, max_comments_per_video)
-            
-            if comment_list:
+            eligible.append((vid, video_title))
+
+        # Bound in-flight commentThreads requests to stay friendly with the API quota
+        sem = asyncio.Semaphore(8)
+
+        async def _fetch(vid: str) -> list:
+            async with sem:
+                return await fetch_comments_for_video_async(client, vid, max_comments_per_video)
+
+        # Fetch comments concurrently in waves sized to the number of videos still needed, so
+        # videos with disabled/irrelevant comments get backfilled without fetching every candidate
+        pos = 0
+        while videos_with_comments < max_videos and pos < len(eligible):
+            wave = eligible[pos:pos + max_videos - videos_with_comments]
+            pos += len(wave)
+            for vid, video_title in wave:
+                logger.info("Trying to fetch comments from financial video: %s (ID: %s)", video_title, vid)
+            results = await asyncio.gather(*(_fetch(vid) for vid, _ in wave))
+
+            for (vid, video_title), comment_list in zip(wave, results):
+                if not comment_list:
+                    # If no comments, continue to next video (don't break - just skip this one)
+                    continue
                 # Filter comments for financial relevance
                 relevant_comments = filter_financial_comments(comment_list)
-                
+
                 if relevant_comments:
                     all_comments.extend(relevant_comments)
                     videos_with_comments += 1
                     logger.info("Successfully fetched %d relevant comments (from %d total) from video: %s", 
                               len(relevant_comments), len(comment_list), video_title)
-                    
+
                     # Store video info with top 3 RELEVANT comments
                     video_summaries.append({
                         "video_id": vid,
@@ -285,15 +436,83 @@ def fetch_youtube_comments_for_query(query: str, max_videos: int = 5, max_commen
                     })
                 else:
                     logger.info("No relevant financial comments found in video: %s", video_title)
-            # If no comments, continue to next video (don't break - just skip this one)
-            
+
         logger.info("Total comments collected from %d videos: %d", videos_with_comments, len(all_comments))
         return {"all_comments": all_comments, "videos": video_summaries}
     except Exception as e:
         logger.warning("YouTube search failed for %s: %s - continuing without YouTube data", query, e)
+        if _is_retryable(e):
+            _circuit_record("youtube", False)
         return {"all_comments": [], "videos": []}
 
 
+# Financial/investment keywords with importance weights (used by filter_financial_comments)
+_HIGH_VALUE_KEYWORDS = {
+    # Investment actions (high value)
+    'buy': 3, 'sell': 3, 'hold': 2, 'invest': 2, 'investing': 2, 'portfolio': 2, 
+    'bullish': 3, 'bearish': 3, 'long term': 3, 'short term': 2,
+    # Valuation (high value)
+    'overvalued': 3, 'undervalued': 3, 'valuation': 2, 'target price': 3, 
+    'fair value': 2, 'intrinsic value': 3, 'discounted': 2,
+    # Financial metrics (medium-high)
+    'pe ratio': 2, 'p/e': 2, 'eps': 2, 'revenue': 2, 'earnings': 2, 'profit': 2, 
+    'dividend': 2, 'yield': 2, 'cash flow': 2, 'debt': 2, 'margin': 2,
+    # Analysis terms
+    'fundamentals': 2, 'analysis': 1, 'forecast': 2, 'prediction': 2, 'outlook': 2,
+    'due diligence': 3, 'dcf': 2, 'balance sheet': 2, 'income statement': 2,
+    # Risk/reward
+    'risk': 2, 'reward': 2, 'opportunity': 2, 'upside': 2, 'downside': 2,
+    'conviction': 2, 'thesis': 2, 'moat': 3, 'competitive advantage': 3,
+}
+
+_MEDIUM_VALUE_KEYWORDS = [
+    'stock', 'share', 'price', 'market cap', 'growth', 'quarter', 'quarterly',
+    'report', 'guidance', 'beat', 'miss', 'estimate', 'market', 'sector',
+    'revenue', 'sales', 'profit', 'margin', 'roi', 'return', 'performance',
+    'financial', 'investor', 'shareholder', 'value', 'worth', 'evaluation',
+    'recommendation', 'rating', 'upgrade', 'downgrade', 'catalyst', 'momentum'
+]
+
+# Negative keywords (spam, off-topic)
+_SPAM_KEYWORDS = [
+    'subscribe', 'like and subscribe', 'check out my', 'click here', 
+    'giveaway', 'free money', 'get rich', 'first!', 'early squad', 
+    'notification squad', 'who else', 'anyone else', 'came here from',
+    'full video', 'check my channel', 'dm me', 'contact me', 'crypto'
+]
+
+# keyword -> total weight; a keyword in both lists scores its high weight + 1
+_KEYWORD_WEIGHTS = dict(_HIGH_VALUE_KEYWORDS)
+for _kw in _MEDIUM_VALUE_KEYWORDS:
+    _KEYWORD_WEIGHTS[_kw] = _KEYWORD_WEIGHTS.get(_kw, 0) + 1
+
+# Aho-Corasick automaton: finds every keyword/spam hit in one pass over the text, with the same
+# substring semantics as `kw in text` ("buy" also hits "buying").
+# Values are (keyword, weight); spam entries carry weight None.
+_keyword_automaton = ahocorasick.Automaton()
+for _kw, _weight in _KEYWORD_WEIGHTS.items():
+    _keyword_automaton.add_word(_kw, (_kw, _weight))
+for _kw in _SPAM_KEYWORDS:
+    _keyword_automaton.add_word(_kw, (_kw, None))
+_keyword_automaton.make_automaton()
+
+
+def _keyword_score(text: str):
+    """Return the summed weight of keywords found in lowercased text (each counted once).
+
+    Returns None when the text contains a spam keyword.
+    """
+    seen = set()
+    score = 0
+    for _, (kw, weight) in _keyword_automaton.iter(text):
+        if weight is None:
+            return None
+        if kw not in seen:
+            seen.add(kw)
+            score += weight
+    return score
+
+
 def filter_financial_comments(comments: list) -> list:
     """Filter and rank comments to keep only those related to financial/investment topics.
     
@@ -306,71 +525,34 @@ def filter_financial_comments(comments: list) -> list:
     
     Returns filtered list of relevant comment dicts, sorted by relevance score.
     """
-    # Financial/investment keywords with importance weights
-    high_value_keywords = {
-        # Investment actions (high value)
-        'buy': 3, 'sell': 3, 'hold': 2, 'invest': 2, 'investing': 2, 'portfolio': 2, 
-        'bullish': 3, 'bearish': 3, 'long term': 3, 'short term': 2,
-        # Valuation (high value)
-        'overvalued': 3, 'undervalued': 3, 'valuation': 2, 'target price': 3, 
-        'fair value': 2, 'intrinsic value': 3, 'discounted': 2,
-        # Financial metrics (medium-high)
-        'pe ratio': 2, 'p/e': 2, 'eps': 2, 'revenue': 2, 'earnings': 2, 'profit': 2, 
-        'dividend': 2, 'yield': 2, 'cash flow': 2, 'debt': 2, 'margin': 2,
-        # Analysis terms
-        'fundamentals': 2, 'analysis': 1, 'forecast': 2, 'prediction': 2, 'outlook': 2,
-        'due diligence': 3, 'dcf': 2, 'balance sheet': 2, 'income statement': 2,
-        # Risk/reward
-        'risk': 2, 'reward': 2, 'opportunity': 2, 'upside': 2, 'downside': 2,
-        'conviction': 2, 'thesis': 2, 'moat': 3, 'competitive advantage': 3,
-    }
-    
-    medium_value_keywords = [
-        'stock', 'share', 'price', 'market cap', 'growth', 'quarter', 'quarterly',
-        'report', 'guidance', 'beat', 'miss', 'estimate', 'market', 'sector',
-        'revenue', 'sales', 'profit', 'margin', 'roi', 'return', 'performance',
-        'financial', 'investor', 'shareholder', 'value', 'worth', 'evaluation',
-        'recommendation', 'rating', 'upgrade', 'downgrade', 'catalyst', 'momentum'
-    ]
-    
-    # Negative keywords (spam, off-topic)
-    spam_keywords = [
-        'subscribe', 'like and subscribe', 'check out my', 'click here', 
-        'giveaway', 'free money', 'get rich', 'first!', 'early squad', 
-        'notification squad', 'who else', 'anyone else', 'came here from',
-        'full video', 'check my channel', 'dm me', 'contact me', 'crypto'
-    ]
-    
     scored_comments = []
+    seen = set()
+    duplicates = 0
     
     for comment in comments:
-        text = comment.get('text', '').lower()
+        # Normalize once; every check below reuses these locals
+        text = (comment.get('text') or '').lower()
         
-        # Minimum word count requirement (at least 10 words for substantive content)
-        word_count = len(text.split())
-        if word_count < 10:
+        # Copy-pasted comments are scored (and sent to the LLM) only once. The key is the whole
+        # lowercased text (at most 1000 chars, truncated on fetch), so replies that merely share
+        # an opening are kept
+        if text in seen:
+            duplicates += 1
             continue
+        seen.add(text)
         
-        # Skip very short comments by character count
+        # Cheapest rejections first, before any keyword scan: very short comments by
+        # character count, then fewer than 10 words (substantive content only)
         if len(text.strip()) < 40:
             continue
-        
-        # Skip spam
-        if any(spam in text for spam in spam_keywords):
+        word_count = len(text.split())
+        if word_count < 10:
             continue
         
-        # Calculate relevance score
-        score = 0
-        
-        # High value keywords
-        for keyword, weight in high_value_keywords.items():
-            if keyword in text:
-                score += weight
-        
-        # Medium value keywords
-        for keyword in medium_value_keywords:
-            if keyword in text:
-                score += 1
+        # Calculate relevance score (None means the comment matched a spam keyword)
+        score = _keyword_score(text)
+        if score is None:
+            continue
         
         # Bonus for longer, more detailed comments
         if word_count > 30:
@@ -394,16 +576,20 @@ def filter_financial_comments(comments: list) -> list:
     # Extract just the comments
     relevant_comments = [item['comment'] for item in scored_comments]
     
-    logger.info("Filtered %d/%d comments as financially relevant (top scores: %s, word counts: %s)", 
-                len(relevant_comments), len(comments),
+    logger.info("Filtered %d/%d comments as financially relevant (dedup_ratio: %.2f, top scores: %s, word counts: %s)", 
+                len(relevant_comments), len(comments), duplicates / len(comments) if comments else 0.0,
                 [item['score'] for item in scored_comments[:5]],
                 [item['word_count'] for item in scored_comments[:5]])
     
     return relevant_comments
 
 
-def fetch_comments_for_video(video_id: str, max_comments: int = 50) -> list:
-    """Helper to fetch comments for a single YouTube video."""
+async def fetch_comments_for_video_async(client: httpx.AsyncClient, video_id: str, max_comments: int = 50) -> list:
+    """Helper to fetch comments for a single YouTube video.
+
+    commentThreads only supports cursor paging, so pages are fetched sequentially; callers
+    run several videos concurrently on the shared client.
+    """
     if not config.YOUTUBE_API_KEY:
         return []
     try:
@@ -411,32 +597,36 @@ def fetch_comments_for_video(video_id: str, max_comments: int = 50) -> list:
         url = "https://www.googleapis.com/youtube/v3/commentThreads"
         params = {"part": "snippet", "videoId": video_id, "maxResults": 100, "key": config.YOUTUBE_API_KEY}
         while len(comments) < max_comments:
-            r = requests.get(url, params=params, timeout=10)
-            
+            r = await _get_with_retry(client, url, params=params)
             # Provide detailed error info for debugging
             if r.status_code == 403:
                 try:
-                    error_data = r.json()
+                    error_data = orjson.loads(r.content)
                     error_reason = error_data.get("error", {}).get("errors", [{}])[0].get("reason", "unknown")
                     logger.warning("YouTube video %s returned 403. Reason: %s (comments may be disabled or API quota exceeded)", video_id, error_reason)
                 except:
                     logger.warning("YouTube video %s returned 403 Forbidden (comments may be disabled)", video_id)
                 return []
-            
+
             r.raise_for_status()
-            data = r.json()
+            data = orjson.loads(r.content)
             for item in data.get("items", []):
                 top = item["snippet"]["topLevelComment"]["snippet"]
-                comments.append({"author": top.get("authorDisplayName"), "text": top.get("textDisplay")})
+                # Truncated on arrival so later stages never carry the full blob around
+                comments.append({"author": top.get("authorDisplayName"), "text": safe_truncate(top.get("textDisplay"), 1000)})
                 if len(comments) >= max_comments:
                     break
             page = data.get("nextPageToken")
             if not page:
                 break
             params["pageToken"] = page
+        _circuit_record("youtube", True)
         return comments
     except Exception as e:
         logger.warning("Failed to fetch comments for video %s: %s", video_id, e)
+        # 404s for deleted videos and malformed items are per-video problems, not an outage
+        if _is_retryable(e):
+            _circuit_record("youtube", False)
         return []
 
 
@@ -448,26 +638,41 @@ except Exception:
     _anthropic_sdk = False
 
 
-def anthropic_complete(prompt: str, max_tokens: int = 512, temperature: float = 0.0) -> str:
+@functools.lru_cache(maxsize=1)
+def _get_anthropic_client():
+    """Shared SDK client so its connection pool (and TLS sessions) are reused across calls."""
+    return Anthropic(api_key=config.ANTHROPIC_API_KEY)
+
+
+def anthropic_complete(prompt: str, max_tokens: int = 512, temperature: float = 0.0, model: Optional[str] = None,
+                       system: Optional[str] = None) -> str:
     """Call Anthropic Messages API endpoint (SDK if installed, otherwise HTTP).
     
-    Returns the text of the completion.
+    model defaults to config.ANTHROPIC_MODEL; pass config.ANTHROPIC_FAST_MODEL for cheap
+    extraction tasks. system is the static instruction prefix from a prompts.*_parts builder, sent
+    as the system prompt. Returns the text of the completion.
     """
+    model = model or config.ANTHROPIC_MODEL
     if not config.ANTHROPIC_API_KEY:
         raise RuntimeError("ANTHROPIC_API_KEY not configured")
+
+    extra = {}
+    if system:
+        extra["system"] = system
     
     if _anthropic_sdk:
         try:
             logger.info("Creating the Summary")
-            client = Anthropic(api_key=config.ANTHROPIC_API_KEY)
+            client = _get_anthropic_client()
             # Use Messages API (current Anthropic format)
             message = client.messages.create(
-                model=config.ANTHROPIC_MODEL,
+                model=model,
                 max_tokens=max_tokens,
                 temperature=temperature,
                 messages=[
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                **extra
             )
             return message.content[0].text
         except Exception as e:
@@ -482,54 +687,166 @@ def anthropic_complete(prompt: str, max_tokens: int = 512, temperature: float =
         "anthropic-version": "2023-06-01"
     }
     payload = {
-        "model": config.ANTHROPIC_MODEL,
+        "model": model,
         "max_tokens": max_tokens,
         "temperature": temperature,
-        "messages": [{"role": "user", "content": prompt}]
+        "messages": [{"role": "user", "content": prompt}],
+        **extra
     }
-    r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
+    # anthropic_complete runs in worker threads, so the fallback uses the shared blocking client
+    r = http.get_sync_client().post(url, headers=headers, content=orjson.dumps(payload), timeout=60)
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
     return data.get("content", [{}])[0].get("text", "")
 
 
 # NOTE: OpenAI support removed — Anthropic-only design
 
 
-def analyze_comments_with_anthropic(comments: List[dict], source_name: str) -> dict:
+def _cached_complete(prompt: str, *, system: Optional[str] = None, model: Optional[str] = None,
+                     ticker: Optional[str] = None, cache_if=None, **params) -> str:
+    """anthropic_complete through the prompt-keyed response cache; responses are tagged with the
+    ticker so prompt_cache.invalidate(ticker) can drop them. cache_if validates a response before
+    it is stored (see prompt_cache.cached_llm_call)."""
+    return prompt_cache.cached_llm_call(
+        anthropic_complete, prompt, model=model or config.ANTHROPIC_MODEL, system=system,
+        tags=(ticker,) if ticker else (), cache_if=cache_if, **params
+    )
+
+
+def _empty_analysis(source_name: str) -> dict:
+    return {"source": source_name, "summary": "", "sentiment": "neutral", "themes": [], "representative": []}
+
+
+# Summary of an analysis whose LLM call failed; the API checks for it before caching a report
+ANALYSIS_FAILED_SUMMARY = "(analysis failed)"
+
+
+def _failed_analysis(source_name: str) -> dict:
+    return {"source": source_name, "summary": ANALYSIS_FAILED_SUMMARY, "sentiment": "unknown", "themes": [], "representative": []}
+
+
+# Prompt-input budget per source: comments arrive best-first, so stop once this many
+# characters have been collected (at most 30 comments, each cut to what the prompt keeps)
+_ANALYSIS_CHAR_BUDGET = 6000
+
+
+def _comment_sample_texts(comments: List[dict]) -> List[str]:
+    sample_texts = []
+    total_chars = 0
+    for c in comments[:30]:
+        text = (c.get("body") or c.get("text") or "")[:prompts.MAX_PER_COMMENT]
+        sample_texts.append(text)
+        total_chars += len(text)
+        if total_chars >= _ANALYSIS_CHAR_BUDGET:
+            break
+    return sample_texts
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _parse_json_object(resp: str) -> dict:
+    """Return the first JSON object embedded in an LLM response; raises ValueError if there is none.
+
+    raw_decode stops at the end of the object, so trailing prose (or stray braces in it) is never
+    scanned; a "{" that doesn't start valid JSON is skipped in favour of the next one.
+    """
+    start = resp.find("{")
+    while start != -1:
+        try:
+            payload, _ = _JSON_DECODER.raw_decode(resp, start)
+            if isinstance(payload, dict):
+                return payload
+        except ValueError:
+            pass
+        start = resp.find("{", start + 1)
+    raise ValueError("no JSON object in response")
+
+
+def _has_json_object(resp: str) -> bool:
+    """cache_if for single-source analyses: only replies that parse are worth caching."""
+    try:
+        _parse_json_object(resp)
+    except ValueError:
+        return False
+    return True
+
+
+def _has_analyses(resp: str) -> bool:
+    """cache_if for batched analyses: the reply must carry an "analyses" list."""
+    try:
+        return isinstance(_parse_json_object(resp).get("analyses"), list)
+    except ValueError:
+        return False
+
+
+def analyze_comments_with_anthropic(comments: List[dict], source_name: str, ticker: Optional[str] = None) -> dict:
     """Use Anthropic to analyze a list of comments and return a structured summary.
     
     Expects comments to be a list of dicts with text/body fields.
     Returns dict with keys: source, summary, sentiment, themes, representative_quotes
     """
     if not comments:
-        return {"source": source_name, "summary": "", "sentiment": "neutral", "themes": [], "representative": []}
-    
-    sample_texts = []
-    for c in comments[:30]:
-        text = c.get("body") or c.get("text") or ""
-        sample_texts.append(safe_truncate(text, 800))
+        return _empty_analysis(source_name)
 
-    prompt = prompts.build_analyze_comments_prompt(sample_texts)
+    system, prompt = prompts.build_analyze_comments_prompt_parts(_comment_sample_texts(comments))
     try:
-        resp = anthropic_complete(prompt, max_tokens=800)
+        resp = _cached_complete(prompt, max_tokens=400, model=config.ANTHROPIC_FAST_MODEL, system=system, ticker=ticker,
+                                 cache_if=_has_json_object)
     except Exception as e:
         logger.warning("Anthropic call failed: %s", e)
-        return {"source": source_name, "summary": "(analysis failed)", "sentiment": "unknown", "themes": [], "representative": []}
+        return _failed_analysis(source_name)
 
     try:
-        text = resp.strip()
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1:
-            payload = json.loads(text[start : end + 1])
-            payload.setdefault("source", source_name)
-            return payload
+        payload = _parse_json_object(resp)
+        payload.setdefault("source", source_name)
+        return payload
     except Exception:
         logger.warning("Failed to parse Anthropic response as JSON; returning raw text")
     return {"source": source_name, "summary": resp}
 
 
+def analyze_all_comments_with_anthropic(sources: Dict[str, List[dict]], ticker: Optional[str] = None) -> List[dict]:
+    """Analyze comments from several sources with a single Anthropic call.
+
+    sources: mapping of source name -> list of comment dicts (text/body fields).
+    Returns one analysis dict per source, in the same order as ``sources``. Sources without
+    comments get an empty analysis; a lone non-empty source uses the single-source prompt.
+    """
+    results = {name: _empty_analysis(name) for name in sources}
+    pending = {name: comments for name, comments in sources.items() if comments}
+    if len(pending) == 1:
+        (name, comments), = pending.items()
+        results[name] = analyze_comments_with_anthropic(comments, name, ticker=ticker)
+    elif pending:
+        system, prompt = prompts.build_batch_analyze_prompt_parts({name: _comment_sample_texts(c) for name, c in pending.items()})
+        try:
+            resp = _cached_complete(prompt, max_tokens=400 * len(pending), model=config.ANTHROPIC_FAST_MODEL, system=system,
+                                     ticker=ticker, cache_if=_has_analyses)
+            analyses = _parse_json_object(resp).get("analyses") or []
+        except Exception as e:
+            logger.warning("Batched Anthropic comment analysis failed: %s", e)
+            analyses = []
+        by_source = {a.get("source"): a for a in analyses if isinstance(a, dict)}
+        for name in pending:
+            results[name] = by_source.get(name) or _failed_analysis(name)
+    return list(results.values())
+
+
+def _history_column(hist, name: str) -> np.ndarray:
+    """Return a price-history column as a float64 array with missing values dropped."""
+    if hist is None or hist.empty:
+        return np.empty(0)
+    col = name if name in hist.columns else name.lower()
+    if col not in hist.columns:
+        return np.empty(0)
+    values = pd.to_numeric(hist[col], errors="coerce").to_numpy(dtype=np.float64)
+    # Yahoo history rarely has gaps, so only pay for the masked copy when there are any
+    missing = np.isnan(values)
+    return values[~missing] if missing.any() else values
+
+
 def compute_company_metrics(yahoo: dict) -> dict:
     """Compute a small set of numeric/derived metrics from yahoo fetch.
 
@@ -537,7 +854,6 @@ def compute_company_metrics(yahoo: dict) -> dict:
     """
     logger.info("Computing financial metrics from Yahoo data")
     info = yahoo.get("info") or {}
-    history = yahoo.get("history") or []
     metrics = {}
     # Basic info-driven metrics
     metrics["market_cap"] = info.get("marketCap")
@@ -547,100 +863,90 @@ def compute_company_metrics(yahoo: dict) -> dict:
     metrics["sector"] = info.get("sector")
     metrics["industry"] = info.get("industry")
 
-    # Compute derived metrics from history (list of records with at least 'Close' and maybe 'Date')
-    closes = []
-    volumes = []
-    for row in history:
-        # row may have 'Close' or 'close' depending on source; be permissive
-        c = row.get("Close") or row.get("close")
-        v = row.get("Volume") or row.get("volume")
-        try:
-            if c is not None:
-                closes.append(float(c))
-            if v is not None:
-                volumes.append(int(v))
-        except Exception:
-            continue
+    # Compute derived metrics from the price history frame (fall back to JSON records if given)
+    hist = yahoo.get("history_df")
+    if hist is None and yahoo.get("history"):
+        hist = pd.DataFrame.from_records(yahoo["history"])
+    closes = _history_column(hist, "Close")
+    volumes = _history_column(hist, "Volume")
 
-    if closes:
+    if closes.size:
         # percent change over available window
-        try:
-            pct_change = (closes[-1] - closes[0]) / closes[0] * 100.0
-        except Exception:
-            pct_change = None
-        metrics["period_pct_change"] = pct_change
+        metrics["period_pct_change"] = float((closes[-1] / closes[0] - 1.0) * 100.0) if closes[0] else None
 
         # moving averages (short=50 or available, long=200 or available)
-        def moving_average(values, window):
-            if len(values) < window:
-                return None
-            return sum(values[-window:]) / window
-
-        metrics["ma_50"] = moving_average(closes, 50) or moving_average(closes, min(10, len(closes)))
-        metrics["ma_200"] = moving_average(closes, 200) or moving_average(closes, min(50, len(closes)))
-
-        # volatility as std dev of daily returns (percent)
-        returns = []
-        for i in range(1, len(closes)):
-            try:
-                returns.append((closes[i] - closes[i - 1]) / closes[i - 1])
-            except Exception:
-                continue
-        if returns:
-            vol = statistics.pstdev(returns) * math.sqrt(252)  # annualized approx
-            metrics["volatility_annual_approx"] = vol
+        def moving_average(window):
+            return float(closes[-window:].mean())
+
+        n = closes.size
+        metrics["ma_50"] = moving_average(50 if n >= 50 else min(10, n))
+        metrics["ma_200"] = moving_average(200 if n >= 200 else min(50, n))
+
+        # volatility as std dev of daily returns (percent); returns are built in a single
+        # buffer (diff then in-place divide) instead of allocating diff and quotient arrays
+        if n > 1:
+            returns = np.subtract(closes[1:], closes[:-1])
+            returns /= closes[:-1]
+            metrics["volatility_annual_approx"] = float(returns.std(ddof=0)) * math.sqrt(252)  # annualized approx
         else:
             metrics["volatility_annual_approx"] = None
 
-    if volumes:
-        metrics["avg_volume"] = sum(volumes) / len(volumes)
+    if volumes.size:
+        metrics["avg_volume"] = float(volumes.mean())
 
     return metrics
 
 
+# Market-cap suffixes, largest first
+_UNITS = ((1_000_000_000_000, "T"), (1_000_000_000, "B"), (1_000_000, "M"))
+
+
 def format_metrics_text(metrics: dict) -> str:
     """Format the metrics dict into a readable short text block for inclusion in prompts/reports."""
     if not metrics:
         return "(no metrics available)"
+    get = metrics.get
     lines = []
-    if metrics.get("sector"):
-        lines.append(f"Sector: {metrics.get('sector')}, Industry: {metrics.get('industry')}")
-    mc = metrics.get("market_cap")
+    sector = get("sector")
+    if sector:
+        lines.append(f"Sector: {sector}, Industry: {get('industry')}")
+    mc = get("market_cap")
     if mc is not None:
         # human-readable market cap
         try:
-            if mc >= 1_000_000_000_000:
-                mc_str = f"${mc/1_000_000_000_000:.2f}T"
-            elif mc >= 1_000_000_000:
-                mc_str = f"${mc/1_000_000_000:.2f}B"
-            elif mc >= 1_000_000:
-                mc_str = f"${mc/1_000_000:.2f}M"
-            else:
-                mc_str = f"${mc}"
+            mc_str = next((f"${mc / div:.2f}{unit}" for div, unit in _UNITS if mc >= div), f"${mc}")
         except Exception:
             mc_str = str(mc)
         lines.append(f"Market cap: {mc_str}")
-    if metrics.get("trailing_pe") is not None:
-        lines.append(f"Trailing P/E: {metrics.get('trailing_pe')}")
-    if metrics.get("forward_pe") is not None:
-        lines.append(f"Forward P/E: {metrics.get('forward_pe')}")
-    if metrics.get("beta") is not None:
-        lines.append(f"Beta: {metrics.get('beta')}")
-    if metrics.get("period_pct_change") is not None:
-        lines.append(f"Price change over sample: {metrics.get('period_pct_change'):.2f}%")
-    if metrics.get("ma_50") is not None:
-        lines.append(f"MA-50 (approx): {metrics.get('ma_50'):.2f}")
-    if metrics.get("ma_200") is not None:
-        lines.append(f"MA-200 (approx): {metrics.get('ma_200'):.2f}")
-    if metrics.get("volatility_annual_approx") is not None:
-        lines.append(f"Approx annual volatility (std): {metrics.get('volatility_annual_approx'):.2%}")
-    if metrics.get("avg_volume") is not None:
-        lines.append(f"Avg volume (sample): {int(metrics.get('avg_volume'))}")
+    trailing_pe = get("trailing_pe")
+    if trailing_pe is not None:
+        lines.append(f"Trailing P/E: {trailing_pe}")
+    forward_pe = get("forward_pe")
+    if forward_pe is not None:
+        lines.append(f"Forward P/E: {forward_pe}")
+    beta = get("beta")
+    if beta is not None:
+        lines.append(f"Beta: {beta}")
+    pct_change = get("period_pct_change")
+    if pct_change is not None:
+        lines.append(f"Price change over sample: {pct_change:.2f}%")
+    ma_50 = get("ma_50")
+    if ma_50 is not None:
+        lines.append(f"MA-50 (approx): {ma_50:.2f}")
+    ma_200 = get("ma_200")
+    if ma_200 is not None:
+        lines.append(f"MA-200 (approx): {ma_200:.2f}")
+    vol = get("volatility_annual_approx")
+    if vol is not None:
+        lines.append(f"Approx annual volatility (std): {vol:.2%}")
+    avg_volume = get("avg_volume")
+    if avg_volume is not None:
+        lines.append(f"Avg volume (sample): {int(avg_volume)}")
 
     return "\n".join(lines)
 
 
-def compare_and_summarize(yahoo: dict, web: dict, social_summaries: List[dict]) -> dict:
+def compare_and_summarize(yahoo: dict, web: dict, social_summaries: List[dict], ticker: Optional[str] = None) -> dict:
     """Use Anthropic to combine sources and produce a markdown opinion.
 
     Returns a dict with keys:
@@ -654,28 +960,30 @@ def compare_and_summarize(yahoo: dict, web: dict, social_summaries: List[dict])
     # metrics_text may be attached to the yahoo dict by the caller
     metrics_text = yahoo.get("_metrics_text", "") if isinstance(yahoo, dict) else ""
 
-    prompt = prompts.build_compare_prompt(yahoo_summary, web_summary, social_summaries, metrics_text=metrics_text)
+    system, prompt = prompts.build_compare_prompt_parts(yahoo_summary, web_summary, social_summaries, metrics_text=metrics_text)
 
     # Use Anthropic exclusively for comparator and return a structured result
     try:
-        md = anthropic_complete(prompt, max_tokens=2048)
+        md = _cached_complete(prompt, max_tokens=prompts.COMPARE_REPORT_TOKENS, system=system, ticker=ticker, cache_if=str.strip)
         return {"markdown": md, "source": "anthropic", "inputs": {"yahoo_summary": yahoo_summary, "web_summary": web_summary, "metrics_text": metrics_text}}
     except Exception as e:
         logger.warning("Anthropic comparator failed: %s", e)
         return {"markdown": "# Error\nLLM comparator failed to run.", "source": "anthropic", "inputs": {"yahoo_summary": yahoo_summary, "web_summary": web_summary, "metrics_text": metrics_text}, "error": str(e)}
 
 
-def generate_company_report(ticker: str) -> dict:
+async def generate_company_report_async(ticker: str) -> dict:
     """Main orchestration: validate ticker, fetch sources, analyze social, compare and return structured report.
 
     Steps:
     1. Validate ticker
-    2. Fetch data from Yahoo, Wikipedia, YouTube
+    2. Fetch data from Yahoo, Wikipedia, YouTube concurrently
     3. Analyze YouTube comments with Anthropic
     4. Compare all sources and generate markdown report with LLM
-    5. Return structured dict
+    5. Return structured dict (normalized to plain JSON-compatible Python types)
+
+    Blocking work (yfinance, Anthropic calls) runs in worker threads so the event loop stays free.
     """
-    ok, meta = validate_ticker(ticker)
+    ok, meta = await validate_ticker_async(ticker.upper())
     if not ok:
         # return structured error
         return {"error": "ticker_validation_failed", "message": meta.get("message")}
@@ -683,24 +991,33 @@ def generate_company_report(ticker: str) -> dict:
     company_name = meta.get("name")
     logger.info("Validated ticker %s -> %s", ticker, company_name)
 
-    yahoo = fetch_yahoo_company(ticker)
-    web = fetch_wikipedia_summary(company_name)
+    # The three sources are independent, so total latency is roughly the slowest fetch.
     # Fetch from more videos (5) and more comments per video (100) to get better filtering
-    yt_data = fetch_youtube_comments_for_query(company_name, max_videos=5, max_comments_per_video=100)
+    yahoo, web, yt_data = await asyncio.gather(
+        fetch_yahoo_company_async(ticker.upper()),
+        fetch_wikipedia_summary_async(company_name),
+        fetch_youtube_comments_for_query_async(company_name, max_videos=5, max_comments_per_video=100),
+    )
     
     # Extract comments and video info
     yt_comments = yt_data.get("all_comments", [])
     yt_videos = yt_data.get("videos", [])
 
-    yt_analysis = analyze_comments_with_anthropic(yt_comments, "YouTube")
+    # One LLM call for every social source (only YouTube today)
+    social_analyses = await asyncio.to_thread(analyze_all_comments_with_anthropic, {"YouTube": yt_comments}, ticker.upper())
 
     # Compute numeric metrics and attach a formatted text block for the comparator
     metrics = compute_company_metrics(yahoo)
     metrics_text = format_metrics_text(metrics)
     # attach to yahoo dict so compare_and_summarize can retrieve it without changing many call sites
-    yahoo["_metrics_text"] = metrics_text
+    # (on a copy: the fetched dict is shared through the fetch cache)
+    yahoo = {**yahoo, "_metrics_text": metrics_text}
+
+    comparator_result = await asyncio.to_thread(compare_and_summarize, yahoo, web, social_analyses, ticker.upper())
 
-    comparator_result = compare_and_summarize(yahoo, web, [yt_analysis])
+    # Drop the raw frame and materialize the history as JSON records exactly once
+    yahoo_out = {k: v for k, v in yahoo.items() if k != "history_df"}
+    yahoo_out["history"] = _history_records(yahoo.get("history_df"))
 
     header = {
         "title": f"Company Insight Report: {company_name} ({ticker.upper()})",
@@ -713,9 +1030,9 @@ def generate_company_report(ticker: str) -> dict:
         "ticker": ticker.upper(),
         "company_name": company_name,
         "metadata": extract_ticker_metadata_from_info(yahoo.get("info", {})),
-        "yahoo": yahoo,
+        "yahoo": yahoo_out,
         "wikipedia": web,
-        "social_analyses": [yt_analysis],
+        "social_analyses": social_analyses,
         "youtube_videos": yt_videos,  # Add video info with top comments
         "metrics": metrics,
         "metrics_text": metrics_text,
@@ -723,4 +1040,15 @@ def generate_company_report(ticker: str) -> dict:
         "header": header,
     }
 
-    return report
+    return _normalize(report)
+
+
+def generate_company_report(ticker: str) -> dict:
+    """Synchronous shim around generate_company_report_async for scripts and other sync callers."""
+    async def _run():
+        try:
+            return await generate_company_report_async(ticker)
+        finally:
+            await close_http_session()
+
+    return asyncio.run(_run())
@@ -0,0 +1,120 @@
+"""Small in-process TTL + LRU cache for the backend fetchers.
+
+Usage:
+
+    @cached(ttl=300)
+    async def fetch_something(key): ...
+
+Results are kept per (function, args) until they expire or are evicted as least recently
+used, and concurrent callers with the same arguments share a single in-flight call.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+import asyncio
+import functools
+import threading
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Size-bounded LRU mapping whose entries also expire after a per-entry TTL (seconds).
+
+    Guarded by a threading.Lock: every operation is a short, non-blocking dict update, and the
+    cache may be touched from worker threads as well as the event loop.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key) -> bool:
+        """Membership test that honours expiry but, unlike get, doesn't refresh LRU order."""
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and item[0] > time.monotonic()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Shared store for every @cached function; keys are prefixed with the function's qualified name
+_store = TTLCache(maxsize=1024)
+
+
+def cached(ttl: float, cache_if: Optional[Callable[[Any], bool]] = None):
+    """Cache an async function's results for ``ttl`` seconds, keyed on its arguments.
+
+    cache_if: optional predicate on the result; results it rejects (e.g. failed fetches) are
+    returned but not stored. Concurrent calls with the same key await one shared task.
+    """
+    def decorator(func):
+        inflight: dict = {}
+
+        async def run(key, args, kwargs):
+            try:
+                value = await func(*args, **kwargs)
+                if cache_if is None or cache_if(value):
+                    _store.set(key, value, ttl)
+                return value
+            finally:
+                if inflight.get(key) is asyncio.current_task():
+                    del inflight[key]
+
+        def _retrieve(task):
+            # Mark the exception retrieved so a task whose callers all went away doesn't log
+            # "exception was never retrieved"
+            if not task.cancelled():
+                task.exception()
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = (func.__qualname__, args, tuple(sorted(kwargs.items())))
+            value = _store.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+            # The call runs in its own task that every caller awaits through shield(), so
+            # cancelling one caller never cancels the shared computation under the others
+            loop = asyncio.get_running_loop()
+            task = inflight.get(key)
+            if task is None or task.get_loop() is not loop:
+                task = loop.create_task(run(key, args, kwargs))
+                task.add_done_callback(_retrieve)
+                inflight[key] = task
+            return await asyncio.shield(task)
+
+        wrapper.cache = _store
+        return wrapper
+
+    return decorator
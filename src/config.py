@@ -14,9 +14,17 @@ YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY")
 
 # Model names / defaults
 ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-2.1")
+# Smaller, faster model for structured extraction (comment analysis); ANTHROPIC_MODEL does the comparison
+ANTHROPIC_FAST_MODEL = os.getenv("ANTHROPIC_FAST_MODEL", "claude-3-5-haiku-20241022")
+
+# Optional YouTube search category filter (e.g. "25" News & Politics, "27" Education); empty = any
+YOUTUBE_CATEGORY_ID = os.getenv("YOUTUBE_CATEGORY_ID", "")
 
 # Frontend/API
 API_URL = os.getenv("API_URL", "http://localhost:8000")
+# Threads dedicated to running report pipelines, and how many may run at once
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "16"))
+REPORT_CONCURRENCY = int(os.getenv("REPORT_CONCURRENCY", "8"))
 
 # Small helper
 def require_key(name: str, value: str):
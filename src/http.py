@@ -0,0 +1,59 @@
+"""Shared httpx clients for the backend's outbound calls (Wikipedia, YouTube, Anthropic HTTP fallback).
+
+Connections are pooled and kept alive between calls, and negotiated as HTTP/2 when the ``h2``
+package is installed so concurrent YouTube requests multiplex over one TCP+TLS connection.
+Every request asks for a gzip/brotli-compressed body.
+"""
+import asyncio
+import atexit
+import functools
+import weakref
+import httpx
+
+# HTTP/2 support is optional (httpx[http2]); plain keep-alive HTTP/1.1 otherwise
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except Exception:
+    _HTTP2 = False
+
+# Ask for compressed JSON bodies; httpx can only decode brotli when brotli is installed (httpx[brotli])
+try:
+    import brotli  # noqa: F401
+    _ACCEPT_ENCODING = "gzip, br"
+except Exception:
+    _ACCEPT_ENCODING = "gzip"
+
+_HEADERS = {"Accept-Encoding": _ACCEPT_ENCODING}
+_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=30)
+_TIMEOUT = httpx.Timeout(10.0)
+
+# An AsyncClient's pool is bound to the event loop that first used it, so there is one client
+# per loop rather than a single process-wide instance. The sync generate_company_report shim
+# runs a fresh loop per call and closes its client on the way out.
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the pooled AsyncClient for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(http2=_HTTP2, headers=_HEADERS, limits=_LIMITS, timeout=_TIMEOUT)
+        _clients[loop] = client
+    return client
+
+
+async def aclose_client() -> None:
+    """Close the AsyncClient bound to the running event loop, if any."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+@functools.lru_cache(maxsize=1)
+def get_sync_client() -> httpx.Client:
+    """Process-wide blocking client for code that runs in worker threads (e.g. anthropic_complete)."""
+    client = httpx.Client(http2=_HTTP2, headers=_HEADERS, limits=_LIMITS, timeout=_TIMEOUT)
+    atexit.register(client.close)
+    return client
@@ -0,0 +1,93 @@
+"""In-process cache for LLM responses, keyed on a hash of the fully rendered prompt.
+
+Usage:
+
+    text = cached_llm_call(anthropic_complete, prompt, model=model, system=system,
+                           tags=(ticker,), max_tokens=800)
+
+Identical calls (same prompt, system prompt, model and parameters) within the TTL are served
+from memory instead of another LLM round trip. Only deterministic calls are cached: with
+temperature > 0 every call goes to the model, and a cache_if predicate keeps replies the caller
+can't use (truncated or malformed JSON) from being stored. invalidate(tag) drops every response stored under
+a tag, e.g. a ticker whose comments or prices changed.
+"""
+from typing import Any, Callable, Dict, Iterable, Optional, Set
+import hashlib
+import threading
+
+from src.cache import TTLCache
+
+DEFAULT_TTL = 3600.0
+
+_store = TTLCache(maxsize=1024)
+
+# tag -> keys stored under it, least recently tagged first. Key sets may outlive their cache
+# entries and are pruned past _MAX_KEYS_PER_TAG; past _MAX_TAGS, tags with no live entries are
+# dropped, then the oldest (its entries still expire by TTL, they just can't be invalidated).
+_tags: Dict[str, Set[tuple]] = {}
+_tags_lock = threading.Lock()
+_MAX_TAGS = 256
+_MAX_KEYS_PER_TAG = 64
+
+
+def prompt_key(prompt: str, model: str, temperature: float = 0.0, system: Optional[str] = None, **params) -> tuple:
+    """Small cache key: a 128-bit blake2b digest of the rendered prompt plus the call parameters."""
+    h = hashlib.blake2b(digest_size=16)
+    if system:
+        h.update(system.encode())
+        h.update(b"\0")
+    h.update(prompt.encode())
+    return (h.hexdigest(), model, temperature, tuple(sorted(params.items())))
+
+
+def cached_llm_call(complete: Callable[..., str], prompt: str, *, model: str, temperature: float = 0.0,
+                    system: Optional[str] = None, tags: Iterable[str] = (), ttl: float = DEFAULT_TTL,
+                    cache_if: Optional[Callable[[str], Any]] = None, **params) -> str:
+    """Return complete(prompt, model=..., temperature=..., system=..., **params), cached for ``ttl`` seconds.
+
+    cache_if: optional predicate on the response text; responses it rejects are returned but not
+    stored, so the next identical call asks the model again. Exceptions propagate and are never cached.
+    """
+    if temperature > 0.0:
+        return complete(prompt, model=model, temperature=temperature, system=system, **params)
+
+    key = prompt_key(prompt, model, temperature, system, **params)
+    text = _store.get(key)
+    if text is not None:
+        return text
+
+    text = complete(prompt, model=model, temperature=temperature, system=system, **params)
+    if cache_if is not None and not cache_if(text):
+        return text
+    _store.set(key, text, ttl)
+    with _tags_lock:
+        for tag in tags:
+            keys = _tags.pop(tag, None) or set()
+            keys.add(key)
+            if len(keys) > _MAX_KEYS_PER_TAG:
+                keys.intersection_update(k for k in keys if k in _store)
+            _tags[tag] = keys
+        if len(_tags) > _MAX_TAGS:
+            _prune_tags()
+    return text
+
+
+def _prune_tags() -> None:
+    """Drop tags with no live entries, then the oldest tags until at most _MAX_TAGS remain. Caller holds _tags_lock."""
+    for tag in [t for t, keys in _tags.items() if not any(k in _store for k in keys)]:
+        del _tags[tag]
+    while len(_tags) > _MAX_TAGS:
+        del _tags[next(iter(_tags))]
+
+
+def invalidate(tag: str) -> int:
+    """Drop every cached response stored under ``tag``; returns how many were still cached."""
+    with _tags_lock:
+        keys = _tags.pop(tag, ())
+    return sum(_store.pop(key, None) is not None for key in keys)
+
+
+def clear() -> None:
+    with _tags_lock:
+        _tags.clear()
+    _store.clear()
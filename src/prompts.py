@@ -2,195 +2,261 @@
 
 Keep prompt text centralized so it's easy to iterate and test.
 """
-from typing import List
+from dataclasses import dataclass, field
+import functools
+import io
+import threading
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Every builder has a *_parts variant returning (system, user): the static instructions come first
+# and are byte-identical across calls; all per-call data goes last, in the user part. The plain
+# string builders join the two parts, and the *_messages builders return system/user chat messages.
+# The instructions are kept short (~260-590 tokens), below Anthropic's 1024-token minimum for
+# prompt caching, so no cache_control marker is sent.
+#
+# The static text lives in module-level constants built once at import, so a call only allocates
+# its small dynamic pieces. The *_tokens builders return token ids for backends that accept them.
+
+
+# Encoded static prefixes keyed by (tokenizer name, prefix). There are only a handful of prefixes,
+# so this stays tiny; the lock covers concurrent first encodes from worker threads.
+_PREFIX_TOKENS: Dict[Tuple[str, str], Tuple[int, ...]] = {}
+_PREFIX_TOKENS_LOCK = threading.Lock()
+
+
+def _to_tokens(parts: Tuple[str, str], enc) -> List[int]:
+    """Encode (system, user) parts as one token list for tokenizer ``enc`` (e.g. a tiktoken Encoding).
+
+    The static system prefix is encoded once per tokenizer and reused; only "\n\n" + user is
+    encoded per call. Splitting at the part boundary can tokenize those two characters slightly
+    differently from encoding the joined string in one go, but it decodes to the same prompt.
+    """
+    system, user = parts
+    key = (getattr(enc, "name", None) or repr(enc), system)
+    prefix = _PREFIX_TOKENS.get(key)
+    if prefix is None:
+        prefix = tuple(enc.encode(system))
+        with _PREFIX_TOKENS_LOCK:
+            _PREFIX_TOKENS[key] = prefix
+    tokens = list(prefix)
+    tokens.extend(enc.encode("\n\n" + user))
+    return tokens
+
+
+def _to_messages(parts: Tuple[str, str]) -> List[Dict[str, Any]]:
+    """Turn (system, user) parts into [system, user] chat messages.
+
+    For Anthropic's Messages API pass messages[0]["content"] as ``system=`` and the rest as ``messages=``.
+    """
+    system, user = parts
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": user},
+    ]
+
+_ANALYZE_SYSTEM = """<task>
+You are a senior financial analyst specializing in investor sentiment and behavioral finance. Analyze the YouTube comments in <youtube_comments>, posted on investment-focused videos about one company's stock.
+</task>
 
+<focus>
+Overall sentiment (bullish, bearish or neutral); specific concerns and opportunities; price predictions, valuation opinions and technical analysis; recurring themes and narratives; risks and catalysts.
+</focus>
 
-def build_analyze_comments_prompt(sample_texts: List[str]) -> str:
-    """Return the prompt string used to analyze YouTube comments about a company's stock/investment.
+<rules>
+- Ignore generic hype and spam; distinguish informed analysis from speculation
+- themes: 3-6 concrete themes discussed repeatedly (e.g. valuation, growth catalysts, competitive position, management)
+- representative_quotes: exactly 3 of the most insightful quotes about outlook or financials
+- summary: 2-3 sentences on the sentiment, the reasoning behind it, and notable consensus or disagreement
+</rules>
+
+<output_format>
+Return ONLY this JSON object, with no other text:
+{"sentiment": "bullish|bearish|neutral", "themes": ["theme1", "theme2", "theme3"], "representative_quotes": ["quote1", "quote2", "quote3"], "summary": "2-3 sentence summary"}
+</output_format>"""
+
+
+# Defensive caps on comment input, whatever the caller passes: characters per comment and in total
+MAX_PER_COMMENT = 400
+MAX_TOTAL = 12000
+
+
+def _trim_samples(sample_texts: List[str]) -> List[str]:
+    """Drop duplicate comments, cut each to MAX_PER_COMMENT chars and stop at MAX_TOTAL chars."""
+    seen = set()
+    trimmed = []
+    total = 0
+    for text in sample_texts:
+        if text in seen:
+            continue
+        seen.add(text)
+        text = text[:MAX_PER_COMMENT]
+        if total + len(text) > MAX_TOTAL:
+            break
+        trimmed.append(text)
+        total += len(text)
+    return trimmed
+
+
+# Builders are pure functions of their inputs and the same inputs recur (retries, re-opened
+# reports), so the rendered parts are memoized. One entry is at most ~15 KB.
+_PROMPT_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=_PROMPT_CACHE_SIZE)
+def _build_analyze_comments_cached(sample_texts: Tuple[str, ...]) -> Tuple[str, str]:
+    joined = "\n---\n".join(_trim_samples(sample_texts))
+    return _ANALYZE_SYSTEM, "".join(("<youtube_comments>\n", joined, "\n</youtube_comments>"))
 
-    sample_texts: small list of comment texts already truncated as needed.
+
+def build_analyze_comments_prompt_parts(sample_texts: List[str]) -> Tuple[str, str]:
+    """Return (system, user) prompt parts used to analyze YouTube comments about a company's stock/investment.
+
+    sample_texts: comment texts; duplicates are dropped and lengths capped (see _trim_samples).
     """
-    joined = "\n---\n".join(sample_texts)
-    prompt = f"""<task_description>
-You are a senior financial analyst specializing in sentiment analysis and behavioral finance. Your task is to analyze investor sentiment from YouTube comments posted on investment-focused videos about a company's stock.
-</task_description>
-
-<analysis_objectives>
-Your analysis must focus on the following key areas:
-1. Overall investment sentiment (bullish, bearish, or neutral)
-2. Specific financial concerns or opportunities mentioned by investors
-3. Price predictions, valuation opinions, and technical analysis references
-4. Recurring investment themes and narrative patterns
-5. Risk factors and catalysts discussed by the community
-</analysis_objectives>
-
-<output_requirements>
-Produce a valid JSON object with the following structure:
-- sentiment: string (must be "bullish", "bearish", or "neutral" - represents overall investment sentiment)
-- themes: array of 3-6 strings (key investment themes, concerns, or opportunities discussed repeatedly)
-- representative_quotes: array of exactly 3 strings (most insightful and articulate quotes about investment outlook or financial analysis)
-- summary: string (2-3 sentences summarizing the overall investor sentiment, key themes, and notable consensus or disagreements)
-</output_requirements>
-
-<quality_standards>
-- Focus on substantive financial insights, not generic hype or spam
-- Identify concrete themes like valuation concerns, growth catalysts, competitive positioning, management quality, etc.
-- Select quotes that demonstrate thoughtful analysis or unique perspectives
-- Ensure summary captures both sentiment and reasoning behind it
-- Distinguish between informed analysis and speculation
-</quality_standards>
-
-<youtube_comments>
-{joined}
-</youtube_comments>
+    return _build_analyze_comments_cached(tuple(sample_texts))
+
+
+def build_analyze_comments_prompt(sample_texts: List[str]) -> str:
+    """Return the prompt string used to analyze YouTube comments about a company's stock/investment."""
+    return "\n\n".join(build_analyze_comments_prompt_parts(sample_texts))
+
+
+def build_analyze_comments_tokens(sample_texts: List[str], enc) -> List[int]:
+    """Token form of build_analyze_comments_prompt for the tokenizer ``enc`` (see _to_tokens)."""
+    return _to_tokens(build_analyze_comments_prompt_parts(sample_texts), enc)
+
+
+def build_analyze_comments_messages(sample_texts: List[str]) -> List[Dict[str, Any]]:
+    """Chat-message form of build_analyze_comments_prompt (see _to_messages)."""
+    return _to_messages(build_analyze_comments_prompt_parts(sample_texts))
+
+
+_BATCH_ANALYZE_SYSTEM = """<task>
+You are a senior financial analyst specializing in investor sentiment and behavioral finance. Analyze the comments about one company's stock in <comments>; each <source> holds one platform's comments. Analyze every source independently.
+</task>
+
+<focus>
+Overall sentiment (bullish, bearish or neutral); specific concerns and opportunities; price predictions, valuation opinions and technical analysis; recurring themes and narratives; risks and catalysts.
+</focus>
+
+<rules>
+- Ignore generic hype and spam; distinguish informed analysis from speculation
+- source: the source name exactly as given
+- themes: 3-6 concrete themes discussed repeatedly (e.g. valuation, growth catalysts, competitive position, management)
+- representative_quotes: exactly 3 of the most insightful quotes about outlook or financials
+- summary: 2-3 sentences on the sentiment, the reasoning behind it, and notable consensus or disagreement
+</rules>
 
 <output_format>
-Return ONLY a valid JSON object with no additional text or explanation. Format:
-{{
-  "sentiment": "bullish|bearish|neutral",
-  "themes": ["theme1", "theme2", "theme3", ...],
-  "representative_quotes": ["quote1", "quote2", "quote3"],
-  "summary": "2-3 sentence summary"
-}}
+Return ONLY this JSON object, with exactly one "analyses" entry per <source> and no other text:
+{"analyses": [{"source": "source name", "sentiment": "bullish|bearish|neutral", "themes": ["theme1", "theme2", "theme3"], "representative_quotes": ["quote1", "quote2", "quote3"], "summary": "2-3 sentence summary"}]}
 </output_format>"""
-    return prompt
 
 
-def build_compare_prompt(yahoo_summary: str, web_summary: str, social_summaries: List[dict], metrics_text: str = "") -> str:
-    """Return the prompt string used to combine sources into a comprehensive investment analysis.
+def build_batch_analyze_prompt_parts(sources: Dict[str, List[str]]) -> Tuple[str, str]:
+    """Return (system, user) prompt parts that analyze comments from several sources in one LLM call.
 
-    social_summaries: list of dicts with keys source, summary, sentiment, themes
-    metrics_text: pre-formatted textual summary of numeric/derived metrics (market cap, P/E, returns, MAs, volatility)
+    sources: mapping of source name -> comment texts, trimmed per source like the single-source prompt.
+    The model is asked for {"analyses": [...]} with one object per source.
     """
-    # Handle social media data (may be empty if YouTube API fails)
-    if social_summaries:
-        social_text = "\n\n".join([
-            f"<source name='{s.get('source')}'>\n<summary>{s.get('summary')}</summary>\n<sentiment>{s.get('sentiment')}</sentiment>\n<themes>{s.get('themes')}</themes>\n</source>"
-            for s in social_summaries
-        ])
-    else:
-        social_text = "<note>No YouTube/social media data available - API may be unavailable or quota exceeded</note>"
-
-    # Determine which sections to emphasize based on available data
-    sentiment_section_title = (
-        "Market Sentiment & Public Perception" 
-        if social_summaries 
-        else "Market Context"
-    )
-    
-    sentiment_section_description = (
-        "Synthesize YouTube/social media sentiment, themes, and investor concerns. Identify consensus views and divergent opinions."
-        if social_summaries
-        else "Provide general market conditions and industry trends based on available data. Discuss competitive landscape and sector dynamics."
+    blocks = "\n\n".join(
+        f"<source name='{name}'>\n" + "\n---\n".join(_trim_samples(texts)) + "\n</source>"
+        for name, texts in sources.items()
     )
+    return _BATCH_ANALYZE_SYSTEM, "".join(("<comments>\n", blocks, "\n</comments>"))
 
-    prompt = f"""<role>
-You are a senior investment analyst at a top-tier financial institution with 15+ years of experience in equity research. You are preparing a comprehensive company analysis report for institutional investors and high-net-worth clients.
-</role>
 
-<task>
-Synthesize the provided data sources into a detailed, professional investment analysis report. Your analysis must be data-driven, balanced, and actionable.
-</task>
+def build_batch_analyze_prompt(sources: Dict[str, List[str]]) -> str:
+    """Return one prompt string that analyzes comments from several sources in a single LLM call."""
+    return "\n\n".join(build_batch_analyze_prompt_parts(sources))
+
+
+def build_batch_analyze_messages(sources: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """Chat-message form of build_batch_analyze_prompt (see _to_messages)."""
+    return _to_messages(build_batch_analyze_prompt_parts(sources))
+
+
+# Comparison prompt: section 5's title/description depend on whether social data is present, so
+# the static instructions are a header, one of two middles, and a footer
+_COMPARE_HEADER = """<role>
+You are a senior equity research analyst (15+ years of experience) writing a company analysis report for institutional and high-net-worth investors.
+</role>
 
 <report_structure>
-Your report must include exactly 8 sections with the following titles and content:
-
-<section number="1" title="Executive Summary">
-- 2-3 concise sentences capturing the company's current state
-- Include company name, ticker, industry, and key investment thesis
-- Highlight the most critical insight or finding from your analysis
-</section>
-
-<section number="2" title="Company Overview">
-- Describe what the company does and its core business model
-- Explain industry position, market share, and competitive advantages
-- Identify key products/services and revenue streams
-- Note any recent strategic shifts or business developments
-</section>
-
-<section number="3" title="Financial Health & Metrics">
-- Create a markdown table with key financial metrics (P/E ratio, market cap, revenue growth, profit margins, debt levels, ROE, etc.)
-- Interpret valuation: Is the stock overvalued, undervalued, or fairly valued?
-- Analyze growth trajectory and financial stability
-- Compare metrics to industry averages where relevant
-- Discuss any red flags or exceptional strengths in the numbers
-</section>
-
-<section number="4" title="Recent Performance">
-- Analyze recent price trends and momentum
-- Discuss moving averages and technical indicators
-- Include a markdown table with recent price data if relevant (52-week high/low, current price, % changes)
-- Explain what's driving recent performance (earnings, news, sector trends)
-- Assess whether current price levels present opportunity or risk
-</section>
-
-<section number="5" title="{sentiment_section_title}">
-- {sentiment_section_description}
-- Highlight specific concerns or opportunities mentioned by investors/market
-- Note any disconnect between public perception and fundamental data
-</section>
-
-<section number="6" title="Key Concerns & Risks">
-Present at least 5 specific risk factors as bullet points:
-- Focus on concrete financial metrics, business fundamentals, and market challenges
-- Include both company-specific and macroeconomic risks
-- Quantify risks where possible (e.g., "high debt-to-equity ratio of X")
-- Consider regulatory, competitive, operational, and market risks
-</section>
-
-<section number="7" title="Positive Signals & Opportunities">
-Present at least 5 specific positive factors as bullet points:
-- Highlight growth catalysts, competitive advantages, and value opportunities
-- Reference specific metrics, initiatives, or market trends
-- Include both near-term catalysts and long-term structural advantages
-- Note any asymmetric risk/reward scenarios
-</section>
-
-<section number="8" title="Investment Outlook">
-- Provide a 3-4 sentence conclusion with clear perspective
-- Offer distinct short-term (0-12 months) and long-term (1-5 years) views
-- Specify investor profiles who should consider this investment (growth, value, income, etc.)
-- Give a nuanced recommendation without being overly promotional or pessimistic
-</section>
+Write exactly these 8 sections, using each numbered title verbatim as its heading:
+
+1. Executive Summary: 2-3 sentences with company name, ticker, industry and the key investment thesis; lead with the most critical finding.
+2. Company Overview: business model, key products/services and revenue streams, industry position, market share and competitive advantages, recent strategic shifts.
+3. Financial Health & Metrics: a table of key metrics (P/E, market cap, revenue growth, margins, debt, ROE, ...); whether the stock is over-, under- or fairly valued; growth trajectory and stability versus industry averages; red flags or exceptional strengths.
+4. Recent Performance: price trend and momentum, moving averages and technicals, a table of recent price data if relevant (52-week high/low, current price, % changes), what is driving performance, and whether current levels are an opportunity or a risk.
+"""
 
+_COMPARE_MIDDLE_WITH_SOCIAL = (
+    "5. Market Sentiment & Public Perception: synthesize social media sentiment, themes and investor concerns, "
+    "including consensus and divergent views"
+)
+_COMPARE_MIDDLE_WITHOUT_SOCIAL = (
+    "5. Market Context: general market conditions, industry trends, competitive landscape and sector dynamics "
+    "from the available data"
+)
+
+_COMPARE_FOOTER = """; specific concerns or opportunities raised by investors or the market; any disconnect between perception and fundamentals.
+6. Key Concerns & Risks: at least 5 bullets, quantified where possible (e.g. "debt-to-equity of X"), covering company-specific, macroeconomic, regulatory, competitive and operational risks.
+7. Positive Signals & Opportunities: at least 5 bullets citing specific metrics, initiatives or trends, covering near-term catalysts, long-term structural advantages and any asymmetric risk/reward.
+8. Investment Outlook: a 3-4 sentence conclusion with distinct short-term (0-12 months) and long-term (1-5 years) views, the investor profiles it suits (growth, value, income, ...) and a nuanced recommendation.
 </report_structure>
 
-<formatting_requirements>
-- Use markdown formatting throughout
-- Use exact section titles as specified above (including numbering)
-- Use markdown tables where appropriate to present financial data clearly
-- Use bullet points for lists (-, not *)
-- Use **bold** for emphasis on key metrics or terms
-- Ensure proper spacing between sections
-</formatting_requirements>
-
-<writing_guidelines>
-<style>
-- Write in a professional, analytical tone suitable for institutional investors
-- Be specific and quantitative - cite actual numbers, percentages, and metrics
-- Avoid generic statements; every claim should tie to data
-- Present balanced analysis showing both bull and bear perspectives
-- Use precise financial terminology
-</style>
-
-<prohibitions>
-- DO NOT cite sources in parentheses (no Yahoo, Wikipedia, Metrics, YouTube citations)
-- DO NOT use promotional or sales language
-- DO NOT make definitive price predictions
-- DO NOT ignore contradictory data
-- Present insights as your own integrated professional analysis
-</prohibitions>
-
-<quality_standards>
-- Ensure all 8 sections are present and substantive
-- Provide actionable insights, not just data summary
-- Connect different data points to form coherent narrative
-- Acknowledge uncertainty and data limitations where relevant
-- If certain data is unavailable, focus analysis on available information without speculation
-</quality_standards>
-</writing_guidelines>
-
-<data_sources>
+<rules>
+- Markdown throughout: "-" bullets, **bold** for key metrics, tables for financial data, a blank line between sections
+- Professional, analytical tone and precise terminology; be specific and quantitative, tying every claim to data
+- Balance bull and bear views, never ignore contradictory data, and acknowledge uncertainty or missing data without speculating
+- Connect the data points into one actionable narrative rather than summarizing each source
+- No source citations in parentheses (Yahoo, Wikipedia, Metrics, YouTube), no promotional language, no definitive price predictions; present the analysis as your own
+</rules>
+
+<output_instruction>
+Write the complete 8-section report from the data sources that follow.
+</output_instruction>"""
+
+
+_SOCIAL_ITEM_TMPL = "<source name='{source}'>\n<summary>{summary}</summary>\n<sentiment>{sentiment}</sentiment>\n<themes>{themes}</themes>\n</source>"
+
+
+class _DefaultingDict(dict):
+    """format_map mapping that renders missing keys as None, like dict.get did."""
+
+    def __missing__(self, key):
+        return None
+
+
+# The two complete instruction prefixes, materialized once: every call with (or without) social
+# data sends the same bytes, so the encoded-prefix cache in _to_tokens is keyed on just two strings
+_COMPARE_PREFIX_SOCIAL = "".join((_COMPARE_HEADER, _COMPARE_MIDDLE_WITH_SOCIAL, _COMPARE_FOOTER))
+_COMPARE_PREFIX_NOSOCIAL = "".join((_COMPARE_HEADER, _COMPARE_MIDDLE_WITHOUT_SOCIAL, _COMPARE_FOOTER))
+
+
+def _compare_system_prompt(has_social: bool) -> str:
+    """Static instructions for the comparison prompt (one of two fixed variants)."""
+    return _COMPARE_PREFIX_SOCIAL if has_social else _COMPARE_PREFIX_NOSOCIAL
+
+
+def _render_social(social_summaries: List[dict]) -> str:
+    """Render the <source> blocks into one buffer; scales to many sources without a list of pieces."""
+    buf = io.StringIO()
+    for i, s in enumerate(social_summaries):
+        if i:
+            buf.write("\n\n")
+        buf.write(_SOCIAL_ITEM_TMPL.format_map(_DefaultingDict(s)))
+    return buf.getvalue()
+
+
+_NO_SOCIAL_NOTE = "<note>No YouTube/social media data available - API may be unavailable or quota exceeded</note>"
+_DATA_SOURCES_TAIL = "\n</social_media_analysis>\n\n</data_sources>"
+
+
+def _data_sources_head(yahoo_summary: str, web_summary: str, metrics_text: str) -> str:
+    """The <data_sources> block up to and including the opening <social_media_analysis> tag."""
+    return f"""<data_sources>
 
 <yahoo_business_summary>
 {yahoo_summary or "(no yahoo summary available)"}
@@ -205,13 +271,154 @@ Present at least 5 specific positive factors as bullet points:
 </financial_metrics>
 
 <social_media_analysis>
-{social_text}
-</social_media_analysis>
+"""
 
-</data_sources>
 
-<output_instruction>
-Generate a comprehensive investment analysis report following the structure and guidelines above. Use well-formatted markdown. Be thorough, insightful, and actionable.
-</output_instruction>"""
-    
-    return prompt
+def _compare_data_sources(yahoo_summary: str, web_summary: str, social_summaries: List[dict], metrics_text: str) -> str:
+    """Render one company's <data_sources> block."""
+    # Handle social media data (may be empty if YouTube API fails)
+    social_text = _render_social(social_summaries) if social_summaries else _NO_SOCIAL_NOTE
+    return "".join((_data_sources_head(yahoo_summary, web_summary, metrics_text), social_text, _DATA_SOURCES_TAIL))
+
+
+_SOCIAL_FIELDS = ("source", "summary", "sentiment", "themes")
+
+
+def _social_key(social_summaries: List[dict]) -> tuple:
+    """Hashable form of social_summaries: (type, value) for every field the template renders,
+    with lists as tuples.
+
+    Keyed on the full values rather than a hash of the summary so two distinct inputs can never
+    share a cached prompt; the type keeps values that compare equal but render differently
+    (a tuple vs a list, 1 vs True) apart, and tells the cached builder which tuples were lists.
+    """
+    return tuple(
+        tuple((type(v), tuple(v) if type(v) is list else v) for v in map(s.get, _SOCIAL_FIELDS))
+        for s in social_summaries
+    )
+
+
+@functools.lru_cache(maxsize=_PROMPT_CACHE_SIZE)
+def _build_compare_prompt_cached(yahoo_summary: str, web_summary: str, social_key: tuple, metrics_text: str) -> Tuple[str, str]:
+    social = [
+        {f: list(v) if t is list else v for f, (t, v) in zip(_SOCIAL_FIELDS, item)}
+        for item in social_key
+    ]
+    user = _compare_data_sources(yahoo_summary, web_summary, social, metrics_text)
+    return _compare_system_prompt(bool(social)), user
+
+
+def build_compare_prompt_parts(yahoo_summary: str, web_summary: str, social_summaries: List[dict], metrics_text: str = "") -> Tuple[str, str]:
+    """Return (system, user) prompt parts used to combine sources into a comprehensive investment analysis.
+
+    social_summaries: list of dicts with keys source, summary, sentiment, themes
+    metrics_text: pre-formatted textual summary of numeric/derived metrics (market cap, P/E, returns, MAs, volatility)
+    """
+    key = _social_key(social_summaries)
+    try:
+        return _build_compare_prompt_cached(yahoo_summary, web_summary, key, metrics_text)
+    except TypeError:
+        # Unhashable field values (e.g. nested dicts): render without the cache
+        user = _compare_data_sources(yahoo_summary, web_summary, social_summaries, metrics_text)
+        return _compare_system_prompt(bool(social_summaries)), user
+
+
+def build_compare_prompt(yahoo_summary: str, web_summary: str, social_summaries: List[dict], metrics_text: str = "") -> str:
+    """Return the prompt string used to combine sources into a comprehensive investment analysis."""
+    return "\n\n".join(build_compare_prompt_parts(yahoo_summary, web_summary, social_summaries, metrics_text))
+
+
+def build_compare_prompt_iter(yahoo_summary: str, web_summary: str, social_summaries: List[dict], metrics_text: str = "") -> Iterator[str]:
+    """Yield build_compare_prompt piece by piece: the instructions, the data-source header, one
+    chunk per <source> block and the closing tags. "".join() of it equals build_compare_prompt.
+
+    For request bodies that carry the prompt verbatim (e.g. a local server taking text/plain),
+    encode each piece and stream it so the full prompt is never held in memory. JSON APIs such as
+    Anthropic's need the prompt escaped inside the body, so each piece must be JSON-escaped first.
+    """
+    yield _compare_system_prompt(bool(social_summaries))
+    yield "\n\n"
+    yield _data_sources_head(yahoo_summary, web_summary, metrics_text)
+    if social_summaries:
+        for i, s in enumerate(social_summaries):
+            if i:
+                yield "\n\n"
+            yield _SOCIAL_ITEM_TMPL.format_map(_DefaultingDict(s))
+    else:
+        yield _NO_SOCIAL_NOTE
+    yield _DATA_SOURCES_TAIL
+
+
+def build_compare_prompt_tokens(yahoo_summary: str, web_summary: str, social_summaries: List[dict], metrics_text: str, enc) -> List[int]:
+    """Token form of build_compare_prompt for the tokenizer ``enc`` (see _to_tokens)."""
+    return _to_tokens(build_compare_prompt_parts(yahoo_summary, web_summary, social_summaries, metrics_text), enc)
+
+
+def build_compare_messages(yahoo_summary: str, web_summary: str, social_summaries: List[dict], metrics_text: str = "") -> List[Dict[str, Any]]:
+    """Chat-message form of build_compare_prompt (see _to_messages)."""
+    return _to_messages(build_compare_prompt_parts(yahoo_summary, web_summary, social_summaries, metrics_text))
+
+
+
+# Output budget for one comparison report (max_tokens of a single build_compare_prompt call)
+COMPARE_REPORT_TOKENS = 2048
+
+# Batched comparison: one copy of the instructions for several companies. A batch call needs
+# max_tokens=COMPARE_REPORT_TOKENS * len(cases); the cap keeps that within the 8192 output tokens
+# of Claude 3.5 Sonnet.
+MAX_COMPARE_BATCH = 4
+
+# Section 5 depends on whether a company has social data, which can differ within a batch, so
+# each <company> block carries its own <section_5> line and the shared instructions defer to it
+_COMPARE_MIDDLE_PER_COMPANY = "5. The title and focus given in that company's <section_5> element"
+_COMPARE_PREFIX_BATCH = "".join((_COMPARE_HEADER, _COMPARE_MIDDLE_PER_COMPANY, _COMPARE_FOOTER))
+
+_COMPARE_BATCH_INSTRUCTION = """<batch_instruction>
+The data sources below cover several companies, each in its own <company> block. Write one complete report per company following the structure and guidelines above, using only that company's data and its <section_5> line for section 5.
+Return ONLY a valid JSON array with exactly one object per <company> block and no additional text:
+[
+  {"id": 1, "ticker": "TICKER", "report": "full markdown report"}
+]
+</batch_instruction>"""
+
+
+@dataclass
+class ComparisonCase:
+    """Inputs of one company's comparison prompt (see build_compare_prompt)."""
+
+    ticker: str
+    yahoo_summary: str = ""
+    web_summary: str = ""
+    social_summaries: List[dict] = field(default_factory=list)
+    metrics_text: str = ""
+
+
+def build_compare_prompt_batch_parts(cases: List[ComparisonCase]) -> Tuple[str, str]:
+    """Return (system, user) prompt parts asking for reports on up to MAX_COMPARE_BATCH companies at once.
+
+    The model is asked for a JSON array of {id, ticker, report}, ids numbered from 1 in input order.
+    Call the model with max_tokens=COMPARE_REPORT_TOKENS * len(cases).
+    """
+    if not cases:
+        raise ValueError("at least one ComparisonCase is required")
+    if len(cases) > MAX_COMPARE_BATCH:
+        raise ValueError(f"at most {MAX_COMPARE_BATCH} companies per batch, got {len(cases)}")
+    system = "\n\n".join((_COMPARE_PREFIX_BATCH, _COMPARE_BATCH_INSTRUCTION))
+    user = "\n\n".join(
+        f"<company id='{i}' ticker='{c.ticker}'>\n"
+        + f"<section_5>{_COMPARE_MIDDLE_WITH_SOCIAL if c.social_summaries else _COMPARE_MIDDLE_WITHOUT_SOCIAL}</section_5>\n"
+        + _compare_data_sources(c.yahoo_summary, c.web_summary, c.social_summaries, c.metrics_text)
+        + "\n</company>"
+        for i, c in enumerate(cases, 1)
+    )
+    return system, user
+
+
+def build_compare_prompt_batch(cases: List[ComparisonCase]) -> str:
+    """Return one prompt string asking for reports on several companies (see build_compare_prompt_batch_parts)."""
+    return "\n\n".join(build_compare_prompt_batch_parts(cases))
+
+
+def build_compare_batch_messages(cases: List[ComparisonCase]) -> List[Dict[str, Any]]:
+    """Chat-message form of build_compare_prompt_batch (see _to_messages)."""
+    return _to_messages(build_compare_prompt_batch_parts(cases))
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+
+from src import api
+
+
+def _report(ticker, comparator_error=None, analysis_summary="ok"):
+    comparator = {"markdown": "# Report", "source": "anthropic"}
+    if comparator_error:
+        comparator = {"markdown": "# Error\nLLM comparator failed to run.", "source": "anthropic", "error": comparator_error}
+    return {
+        "ticker": ticker,
+        "social_analyses": [{"source": "YouTube", "summary": analysis_summary}],
+        "comparator": comparator,
+    }
+
+
+def _client(monkeypatch, reports):
+    calls = []
+
+    async def fake_generate(ticker):
+        calls.append(ticker)
+        return reports[min(len(calls), len(reports)) - 1]
+
+    api._REPORT_CACHE.clear()
+    monkeypatch.setattr(api, "generate_company_report_async", fake_generate)
+    return TestClient(api.app), calls
+
+
+def test_comparator_failure_is_regenerated(monkeypatch):
+    client, calls = _client(monkeypatch, [_report("AAPL", comparator_error="timeout"), _report("AAPL")])
+
+    first = client.post("/report", json={"ticker": "aapl"})
+    second = client.post("/report", json={"ticker": "aapl"})
+    third = client.post("/report", json={"ticker": "aapl"})
+
+    assert first.json()["comparator"]["error"] == "timeout"
+    assert first.headers["cache-control"] == "no-store"
+    assert "etag" not in first.headers
+    assert second.headers["cache-control"].startswith("private, max-age=")
+    assert "etag" in second.headers
+    assert "error" not in second.json()["comparator"]
+    assert third.json() == second.json()
+    assert calls == ["AAPL", "AAPL"]
+
+
+def test_failed_analysis_is_not_cached(monkeypatch):
+    client, calls = _client(monkeypatch, [_report("MSFT", analysis_summary=api.ANALYSIS_FAILED_SUMMARY)])
+
+    client.post("/report", json={"ticker": "MSFT"})
+    client.post("/report", json={"ticker": "MSFT"})
+
+    assert calls == ["MSFT", "MSFT"]
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from src.cache import cached
+
+
+def test_cancelling_one_caller_does_not_cancel_the_others():
+    calls = []
+
+    @cached(ttl=60)
+    async def slow(key):
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return key * 2
+
+    async def run():
+        first = asyncio.ensure_future(slow(21))
+        second = asyncio.ensure_future(slow(21))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == 42
+    assert calls == [21]
+
+
+def test_failures_are_shared_and_not_cached():
+    calls = []
+
+    @cached(ttl=60)
+    async def boom(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        raise ValueError(key)
+
+    async def run():
+        return await asyncio.gather(boom("k"), boom("k"), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+    assert calls == ["k"]
+    asyncio.run(run())
+    assert calls == ["k", "k"]
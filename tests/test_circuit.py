@@ -0,0 +1,58 @@
+import asyncio
+
+import httpx
+import pytest
+from tenacity import wait_none
+
+from src import backend, config
+
+
+@pytest.fixture(autouse=True)
+def youtube(monkeypatch):
+    backend._circuit["youtube"] = {"fails": [], "open_until": 0.0}
+    monkeypatch.setattr(config, "YOUTUBE_API_KEY", "key")
+    monkeypatch.setattr(backend._get_with_retry.retry, "wait", wait_none())
+
+
+class _StatusClient:
+    """Fake client answering every GET with ``status`` (an empty comment page for 200)."""
+
+    def __init__(self, status):
+        self.status = status
+
+    async def get(self, url, **kwargs):
+        return httpx.Response(self.status, json={"items": []}, request=httpx.Request("GET", url))
+
+
+def _fetch(status, videos=1):
+    async def run():
+        client = _StatusClient(status)
+        return await asyncio.gather(*(backend.fetch_comments_for_video_async(client, f"v{i}") for i in range(videos)))
+
+    return asyncio.run(run())
+
+
+def test_deleted_videos_do_not_open_circuit():
+    assert _fetch(404, videos=5) == [[]] * 5
+    assert not backend._circuit_open("youtube")
+
+
+def test_consecutive_transient_failures_open_circuit():
+    _fetch(503, videos=backend._CIRCUIT_THRESHOLD)
+    assert backend._circuit_open("youtube")
+
+
+def test_success_resets_failures():
+    _fetch(503, videos=backend._CIRCUIT_THRESHOLD - 1)
+    _fetch(200)
+    _fetch(503)
+    assert not backend._circuit_open("youtube")
+
+
+def test_old_failures_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(backend.time, "monotonic", lambda: now[0])
+    _fetch(503, videos=backend._CIRCUIT_THRESHOLD - 1)
+    now[0] += backend._CIRCUIT_WINDOW + 1
+    _fetch(503)
+    assert not backend._circuit_open("youtube")
@@ -0,0 +1,22 @@
+import pytest
+
+from src import backend
+
+
+def _substring_score(text):
+    """Reference scoring: plain `kw in text` checks over the keyword tables."""
+    if any(spam in text for spam in backend._SPAM_KEYWORDS):
+        return None
+    return sum(weight for kw, weight in backend._KEYWORD_WEIGHTS.items() if kw in text)
+
+
+@pytest.mark.parametrize("text", [
+    "i am buying more shares, the stock is undervalued and dividends keep growing every quarter",
+    "long term hold. p/e ratio looks fine and the balance sheet has little debt",
+    "great video, like and subscribe for more stock picks",
+    "first! anyone else here before the earnings report?",
+    "nothing relevant in this comment at all",
+    "",
+])
+def test_keyword_score_matches_substring_scoring(text):
+    assert backend._keyword_score(text) == _substring_score(text)
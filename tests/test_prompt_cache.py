@@ -0,0 +1,61 @@
+from src import backend, prompt_cache
+
+
+def setup_function():
+    prompt_cache.clear()
+
+
+def _counting(replies):
+    calls = []
+
+    def complete(prompt, **kwargs):
+        calls.append(prompt)
+        return replies[min(len(calls), len(replies)) - 1]
+
+    return complete, calls
+
+
+def test_rejected_response_is_not_cached():
+    complete, calls = _counting(["not json", '{"ok": true}'])
+    for _ in range(3):
+        prompt_cache.cached_llm_call(complete, "p", model="m", cache_if=lambda t: t.startswith("{"))
+    assert len(calls) == 2
+
+
+def test_accepted_response_is_cached():
+    complete, calls = _counting(['{"ok": true}'])
+    for _ in range(3):
+        prompt_cache.cached_llm_call(complete, "p", model="m", cache_if=lambda t: t.startswith("{"))
+    assert len(calls) == 1
+
+
+def test_malformed_analysis_is_retried(monkeypatch):
+    complete, calls = _counting(['{"summary": "cut off', '{"summary": "ok", "sentiment": "bullish"}'])
+    monkeypatch.setattr(backend, "anthropic_complete", complete)
+    comments = [{"text": "buying more shares"}]
+
+    first = backend.analyze_comments_with_anthropic(comments, "YouTube", ticker="AAPL")
+    second = backend.analyze_comments_with_anthropic(comments, "YouTube", ticker="AAPL")
+    third = backend.analyze_comments_with_anthropic(comments, "YouTube", ticker="AAPL")
+
+    assert first == {"source": "YouTube", "summary": '{"summary": "cut off'}
+    assert second["sentiment"] == third["sentiment"] == "bullish"
+    assert len(calls) == 2
+
+
+def test_tag_index_is_bounded(monkeypatch):
+    monkeypatch.setattr(prompt_cache, "_MAX_TAGS", 4)
+    complete, _ = _counting(["ok"])
+    for i in range(10):
+        prompt_cache.cached_llm_call(complete, f"p{i}", model="m", tags=(f"T{i}",))
+    assert list(prompt_cache._tags) == ["T6", "T7", "T8", "T9"]
+    assert prompt_cache.invalidate("T9") == 1
+
+
+def test_tags_without_live_entries_are_dropped(monkeypatch):
+    monkeypatch.setattr(prompt_cache, "_MAX_TAGS", 2)
+    complete, _ = _counting(["ok"])
+    prompt_cache.cached_llm_call(complete, "old", model="m", tags=("OLD",), ttl=-1)
+    prompt_cache.cached_llm_call(complete, "a", model="m", tags=("A",))
+    prompt_cache.cached_llm_call(complete, "b", model="m", tags=("B",))
+    assert set(prompt_cache._tags) == {"A", "B"}
@@ -0,0 +1,25 @@
+import pytest
+
+from src import prompts
+
+
+def _uncached(yahoo, web, social, metrics):
+    return prompts._compare_data_sources(yahoo, web, social, metrics)
+
+
+@pytest.mark.parametrize("social", [
+    [],
+    [{"source": "YouTube", "summary": "s", "sentiment": "bullish", "themes": ["a", "b"]}],
+    [{"source": "YouTube", "themes": ("t",)}],
+    [{"source": "YouTube", "summary": None, "sentiment": 1, "themes": "plain"}],
+    [{"source": "YouTube", "sentiment": True}],
+])
+def test_cached_compare_prompt_matches_uncached_rendering(social):
+    for _ in range(2):
+        _, user = prompts.build_compare_prompt_parts("y", "w", social, "m")
+        assert user == _uncached("y", "w", social, "m")
+
+
+def test_compare_prompt_iter_joins_to_prompt():
+    social = [{"source": "YouTube", "summary": "s", "sentiment": "bearish", "themes": ["a"]}]
+    assert "".join(prompts.build_compare_prompt_iter("y", "w", social, "m")) == prompts.build_compare_prompt("y", "w", social, "m")